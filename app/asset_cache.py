@@ -0,0 +1,276 @@
+# app/asset_cache.py
+import os
+import fcntl
+import shutil
+import hashlib
+import threading
+import subprocess
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+# manim 기본값(media/Tex, media/texts)은 cwd 기준이라 worker/컨테이너마다 따로 식는다 → 고정된 공유 root
+ASSET_CACHE_DIR = Path(os.getenv("ASSET_CACHE_DIR", "cache/manim_assets")).resolve()
+ASSET_CACHE_MAX_MB = int(os.getenv("ASSET_CACHE_MAX_MB", "512"))
+ASSET_EVICT_EVERY = int(os.getenv("ASSET_EVICT_EVERY", "20"))   # render N번마다 크기 확인
+ASSET_PREWARM = os.getenv("ASSET_PREWARM", "1") == "1"
+
+TEX_DIR = ASSET_CACHE_DIR / "Tex"
+TEXT_DIR = ASSET_CACHE_DIR / "texts"
+WORK_DIR = ASSET_CACHE_DIR / ".work"     # 컴파일 중간 파일 / lock (eviction 대상 아님)
+
+
+def tex_key(expression: str, environment, tex_template) -> str:
+    """공유 TEX_DIR 안의 SVG 이름. tex_to_svg(개별)와 batch_tex(일괄)가 같은 key를 써야 서로 hit."""
+    return hashlib.sha256(
+        repr((expression, environment, getattr(tex_template, "body", ""))).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+@contextmanager
+def file_lock(name: str):
+    """프로세스 간 lock: 같은 hash를 두 worker가 동시에 컴파일하지 않게."""
+    lock_dir = WORK_DIR / "locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    with open(lock_dir / f"{name}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class AssetCache:
+    """
+    Tex/Text SVG 공유 캐시.
+    - 결과는 같은 파일시스템의 임시 이름으로 만든 뒤 os.replace → 반쯤 쓰인 SVG가 보이지 않음
+    - hash별 file lock으로 중복 컴파일 방지, 조회 시 mtime 갱신 → 크기 초과 시 LRU 순서로 삭제
+    """
+
+    def __init__(self, root: Path = ASSET_CACHE_DIR, max_bytes: int = ASSET_CACHE_MAX_MB * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.compiles = 0
+        self._renders = 0
+
+    def _touch(self, path: Path) -> bool:
+        try:
+            os.utime(path)  # LRU 갱신
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def publish(self, src: Path, dst: Path):
+        tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+        os.replace(src, tmp)
+        os.replace(tmp, dst)
+        with self._lock:
+            self.compiles += 1
+
+    def tex_to_svg(self, original, expression, environment=None, tex_template=None) -> Path:
+        """manim tex_to_svg_file 대체: 공유 TEX_DIR/<hash>.svg 를 돌려준다."""
+        from manim import config
+
+        key = tex_key(expression, environment, tex_template or config.tex_template)
+        dst = TEX_DIR / f"{key}.svg"
+        if self._touch(dst):
+            return dst
+
+        with file_lock(f"tex-{key}"):
+            if self._touch(dst):
+                return dst
+            # manim은 tex_dir 안의 svg 아닌 파일을 통째로 지우므로 worker 전용 작업 폴더에서 컴파일
+            work = WORK_DIR / f"tex-{os.getpid()}"
+            work.mkdir(parents=True, exist_ok=True)
+            shared_dir = config.tex_dir
+            config.tex_dir = str(work)
+            try:
+                svg = Path(original(expression, environment=environment, tex_template=tex_template))
+            finally:
+                config.tex_dir = shared_dir
+            TEX_DIR.mkdir(parents=True, exist_ok=True)
+            self.publish(svg, dst)
+        return dst
+
+    def text_to_svg(self, original, *args, **kwargs) -> str:
+        """manimpango.text2svg 대체: Text가 정한 파일 이름(<hash>.svg)에 원자적으로 쓴다."""
+        args = list(args)
+        if "file_name" in kwargs:
+            dst = Path(kwargs["file_name"])
+        else:
+            dst = Path(args[4])
+        if self._touch(dst):
+            return str(dst)
+
+        with file_lock(f"text-{dst.stem}"):
+            if self._touch(dst):
+                return str(dst)
+            tmp = WORK_DIR / f"text-{os.getpid()}-{dst.name}"
+            if "file_name" in kwargs:
+                kwargs["file_name"] = str(tmp)
+            else:
+                args[4] = str(tmp)
+            original(*args, **kwargs)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            self.publish(tmp, dst)
+        return str(dst)
+
+    def batch_tex(self, expressions: List[str], environment: str = "align*") -> int:
+        """
+        아직 없는 MathTex SVG를 한 번에: 식마다 한 페이지인 LaTeX 문서 1개 → latex 1회 + dvisvgm 1회.
+        기본(standalone) 템플릿이 아니거나 컴파일이 실패하면 아무것도 하지 않는다 (construct에서 평소대로 개별 컴파일).
+        반환값은 새로 만든 SVG 수.
+        """
+        from manim import config
+        from manim.utils.tex_file_writing import tex_compilation_command
+
+        template = config.tex_template
+        missing: Dict[str, str] = {}
+        for expr in expressions:
+            expr = expr.strip()   # SingleStringMathTex와 같은 전처리 (특수 케이스가 있는 식은 개별 컴파일로)
+            key = tex_key(expr, environment, template)
+            if not (TEX_DIR / f"{key}.svg").exists():
+                missing.setdefault(key, expr)
+        if not missing:
+            return 0
+
+        body = template.body
+        docclass = template.documentclass
+        if docclass not in body or "[preview]{standalone}" not in docclass:
+            return 0
+        head, tail = body.split(template.placeholder_text, 1)
+        head = head.replace(docclass, docclass.replace("[preview]", "[preview,multi]"), 1)
+        pages = "\n".join(
+            f"\\begin{{standalone}}\n\\begin{{{environment}}}\n{expr}\n\\end{{{environment}}}\n\\end{{standalone}}"
+            for expr in missing.values()
+        )
+
+        work = WORK_DIR / f"batch-{os.getpid()}"
+        shutil.rmtree(work, ignore_errors=True)
+        work.mkdir(parents=True)
+        try:
+            tex_file = work / "batch.tex"
+            tex_file.write_text(head + pages + tail, encoding="utf-8")
+            cmd = tex_compilation_command(template.tex_compiler, template.output_format, tex_file, work)
+            if os.system(cmd) != 0:
+                print(f"⚠️ batch tex failed ({len(missing)} exprs), falling back to per-label compile")
+                return 0
+            dvi = tex_file.with_suffix(template.output_format)
+            subprocess.run(
+                ["dvisvgm", *(["--pdf"] if template.output_format == ".pdf" else []),
+                 "--page=1-", str(dvi), "-n", "-v", "0", "-o", str(work / "page-%p.svg")],
+                capture_output=True,
+            )
+            # dvisvgm은 페이지 수에 따라 번호를 0으로 채우기도 하므로 파일 이름에서 번호를 읽는다
+            page_files = {int(p.stem.rsplit("-", 1)[1]): p for p in work.glob("page-*.svg")}
+            TEX_DIR.mkdir(parents=True, exist_ok=True)
+            made = 0
+            for page, key in enumerate(missing, start=1):
+                src = page_files.get(page)
+                if src is not None:
+                    self.publish(src, TEX_DIR / f"{key}.svg")
+                    made += 1
+            return made
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+    def after_render(self):
+        with self._lock:
+            self._renders += 1
+            due = self._renders % max(1, ASSET_EVICT_EVERY) == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        files = []
+        total = 0
+        for p in list(TEX_DIR.glob("*.svg")) + list(TEXT_DIR.glob("*.svg")):
+            if p.name.startswith("."):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+
+        files.sort()
+        removed = 0
+        for _, size, p in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                pass
+        if removed:
+            print(f"🧹 asset cache evicted: {removed} svg(s)")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "compiles": self.compiles}
+
+
+asset_cache = AssetCache()
+
+
+def configure_manim():
+    """
+    worker 프로세스에서 한 번: manim의 tex_dir/text_dir를 공유 root로 돌리고,
+    Tex/Text SVG 생성 함수를 lock + atomic rename 버전으로 감싼다.
+    """
+    import manimpango
+    from manim import config
+    import manim.utils.tex_file_writing as tex_file_writing
+    import manim.mobject.text.tex_mobject as tex_mobject
+
+    for d in (TEX_DIR, TEXT_DIR, WORK_DIR):
+        d.mkdir(parents=True, exist_ok=True)
+    config.tex_dir = str(TEX_DIR)
+    config.text_dir = str(TEXT_DIR)
+
+    original_tex = tex_file_writing.tex_to_svg_file
+    if not getattr(original_tex, "_shared_cache", False):
+        def tex_to_svg_file(expression, environment=None, tex_template=None):
+            return asset_cache.tex_to_svg(original_tex, expression, environment, tex_template)
+        tex_to_svg_file._shared_cache = True
+        tex_file_writing.tex_to_svg_file = tex_to_svg_file
+        if hasattr(tex_mobject, "tex_to_svg_file"):
+            tex_mobject.tex_to_svg_file = tex_to_svg_file
+
+    original_text = manimpango.text2svg
+    if not getattr(original_text, "_shared_cache", False):
+        def text2svg(*args, **kwargs):
+            return asset_cache.text_to_svg(original_text, *args, **kwargs)
+        text2svg._shared_cache = True
+        manimpango.text2svg = text2svg
+
+
+def cli_config_file() -> str:
+    """manim CLI subprocess용 manim.cfg (같은 공유 tex_dir/text_dir를 쓰도록)."""
+    cfg = WORK_DIR / "manim.cfg"
+    if not cfg.exists():
+        WORK_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cfg.with_name(f".manim.cfg.{os.getpid()}.tmp")
+        tmp.write_text(f"[CLI]\ntex_dir = {TEX_DIR}\ntext_dir = {TEXT_DIR}\n", encoding="utf-8")
+        os.replace(tmp, cfg)
+    return str(cfg)
+
+
+def prewarm():
+    """자주 쓰는 라벨(제목, "Sorted!", "Feature Map", 숫자 glyph, 범례 문구)을 첫 요청 전에 만들어 둔다."""
+    if not ASSET_PREWARM:
+        return
+    from app.scenes import prewarm_scenes
+
+    n = prewarm_scenes()
+    asset_cache.evict()
+    s = asset_cache.stats()
+    print(f"🔥 asset cache prewarm [{os.getpid()}]: {n} labels ({s['compiles']} compiled, {s['hits']} from disk)")
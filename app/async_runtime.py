@@ -0,0 +1,47 @@
+# app/async_runtime.py
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+# AsyncOpenAI 의 connection pool은 처음 쓴 event loop에 묶인다.
+# job worker thread마다 asyncio.run()을 하면 loop가 여러 개가 되므로,
+# 모든 파이프라인 coroutine은 이 모듈이 띄운 loop 하나에서 실행한다.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="pipeline-loop", daemon=True)
+            _thread.start()
+        return _loop
+
+
+def run_coroutine(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    blocking thread(JobQueue worker)에서 호출: 공유 loop에서 coroutine을 실행하고 결과를 기다린다.
+    worker thread는 결과가 나올 때까지 점유되므로 JobQueue의 동시 실행 제한은 그대로 유지된다.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def shutdown_loop():
+    global _loop, _thread
+    with _lock:
+        if _loop is None:
+            return
+        _loop.call_soon_threadsafe(_loop.stop)
+        if _thread is not None:
+            _thread.join(timeout=5)
+        if not _loop.is_running():
+            _loop.close()
+        _loop, _thread = None, None
@@ -0,0 +1,169 @@
+# app/attention_engine.py
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+ATTENTION_SEED = int(os.getenv("ATTENTION_SEED", "7"))
+ATTENTION_HEADS = int(os.getenv("ATTENTION_HEADS", "1"))
+D_MODEL = 16
+TOP_K = 4
+DEFAULT_SENTENCE = "I want to play"   # 예문을 찾을 수 없고 LLM도 쓸 수 없을 때
+
+# next-token 후보를 뽑을 작은 영어 vocabulary
+VOCAB = [
+    "the", "a", "to", "and", "of", "with", "for", "in", "on", "now", "more", "again",
+    "today", "tomorrow", "soon", "here", "there", "home", "outside", "together",
+    "game", "games", "football", "soccer", "music", "guitar", "piano", "pizza", "food",
+    "something", "it", "you", "me", "them", "this", "that", "water", "coffee", "tea",
+    "book", "movie", "school", "work", "friends", "time", "sleep", "run", "eat", "go",
+    "play", "learn", "see", "be", "is", "was", "very", "well", "fast", "world", ".",
+]
+
+# 요청 안에서 예문이 아닌 기술 용어 (예문 후보에서 제외)
+META_WORDS = {
+    "next", "token", "tokens", "prediction", "predict", "self", "attention", "self-attention",
+    "transformer", "query", "key", "value", "head", "heads", "multi", "multi-head", "softmax",
+    "gpt", "llm", "model", "weights", "weight", "encoder", "decoder", "scaled", "dot-product",
+    "masked", "cross-attention", "layer", "paper",
+}
+
+# 큰따옴표/백틱을 먼저, 작은따옴표는 단어 중간의 apostrophe(Let's, don't)가 아닐 때만 따옴표로 본다
+QUOTED_RES = [
+    re.compile(r"[\"“”`]([^\"“”`]+)[\"“”`]"),
+    re.compile(r"(?<![A-Za-z])['‘]([^'‘’]+)['’](?![A-Za-z])"),
+]
+BEFORE_RANO_RE = re.compile(r"([A-Za-z][A-Za-z0-9',.!?\- ]*?)\s*(?:이)?라는")
+LATIN_RUN_RE = re.compile(r"[A-Za-z][A-Za-z0-9'\-]*(?:\s+[A-Za-z][A-Za-z0-9'\-]*)+")
+HANGUL_RE = re.compile(r"[가-힣]")
+
+
+def _is_example(candidate: str) -> bool:
+    words = [w.strip(".,!?").lower() for w in candidate.split()]
+    return bool(words) and not all(w in META_WORDS for w in words)
+
+
+def _is_title(run: str) -> bool:
+    """"Scaled Dot-Product Attention", "Attention Is All You Need" 처럼 모든 단어가 대문자로 시작하는 이름/제목."""
+    return all(w[0].isupper() for w in run.split())
+
+
+def _example_runs(user_text: str) -> List[str]:
+    """한국어 설명 속 영어 구절 중 예문 후보 (기술 용어와 제목은 제외)."""
+    return [
+        m.group(0).strip() for m in LATIN_RUN_RE.finditer(user_text)
+        if _is_example(m.group(0)) and not _is_title(m.group(0))
+    ]
+
+
+def extract_sentence(user_text: str) -> Optional[str]:
+    """
+    prompts.py seq_attention 규칙과 같은 우선순위로 입력 문장을 찾는다.
+    1) 따옴표/백틱 안  2) '...라는 문장' 앞의 영어  3) 한국어 설명 속의 영어 구절
+    확실하지 않으면 None (→ LLM 추출).
+    """
+    for quoted_re in QUOTED_RES:
+        for m in quoted_re.finditer(user_text):
+            cand = m.group(1).strip()
+            if re.search(r"[A-Za-z]", cand) and _is_example(cand):
+                return cand
+
+    m = BEFORE_RANO_RE.search(user_text)
+    if m and _is_example(m.group(1)):
+        return m.group(1).strip()
+
+    # 영어만으로 된 요청은 어디까지가 예문인지 알 수 없으므로 LLM에 맡긴다.
+    # 후보가 둘 이상이어도 어느 쪽이 예문인지 모르므로 LLM으로
+    if HANGUL_RE.search(user_text):
+        runs = _example_runs(user_text)
+        if len(runs) == 1:
+            return runs[0]
+    return None
+
+
+def fallback_sentence(user_text: str) -> str:
+    """LLM 추출을 쓸 수 없을 때: 가장 긴 영어 구절, 없으면 DEFAULT_SENTENCE."""
+    runs = _example_runs(user_text)
+    return max(runs, key=len) if runs else DEFAULT_SENTENCE
+
+
+# ---------- 수치 계산 ----------
+def _token_vector(token: str, dim: int) -> np.ndarray:
+    """토큰 문자열만으로 정해지는 작은 임베딩 (같은 토큰 → 항상 같은 벡터)."""
+    rng = np.random.default_rng(zlib.crc32(token.lower().encode("utf-8")) + ATTENTION_SEED)
+    return rng.standard_normal(dim) / np.sqrt(dim)
+
+
+def _positional_encoding(n: int, dim: int) -> np.ndarray:
+    pos = np.arange(n)[:, None]
+    i = np.arange(dim)[None, :]
+    angle = pos / np.power(10000.0, (2 * (i // 2)) / dim)
+    return np.where(i % 2 == 0, np.sin(angle), np.cos(angle)) * 0.1
+
+
+def _softmax(x: np.ndarray, axis: int = -1) -> np.ndarray:
+    e = np.exp(x - x.max(axis=axis, keepdims=True))
+    return e / e.sum(axis=axis, keepdims=True)
+
+
+def compute_attention_ir(raw_text: str, num_heads: int = ATTENTION_HEADS,
+                         query_index: Optional[int] = None) -> Dict[str, Any]:
+    """
+    whitespace 토큰 위에서 seed 고정 single/multi-head causal self-attention을 계산해
+    validate_attention_ir 를 통과하는 seq_attention IR을 만든다.
+    multi-head일 때 weights는 head 평균 (scene이 1D row를 그리므로).
+    """
+    tokens = raw_text.split()
+    if not tokens:
+        raise ValueError("attention input sentence is empty")
+    n = len(tokens)
+    q_idx = n - 1 if query_index is None else query_index
+    if not 0 <= q_idx < n:
+        raise ValueError(f"query_index out of range: {q_idx}")
+
+    num_heads = max(1, num_heads)
+    d_head = max(1, D_MODEL // num_heads)
+    rng = np.random.default_rng(ATTENTION_SEED)
+    w_q = rng.standard_normal((num_heads, D_MODEL, d_head))
+    w_k = rng.standard_normal((num_heads, D_MODEL, d_head))
+    w_v = rng.standard_normal((num_heads, D_MODEL, d_head))
+    w_o = rng.standard_normal((num_heads * d_head, D_MODEL)) / np.sqrt(num_heads * d_head)
+
+    x = np.stack([_token_vector(t, D_MODEL) for t in tokens]) + _positional_encoding(n, D_MODEL)
+
+    # (heads, n, d_head)
+    q = np.einsum("nd,hde->hne", x, w_q)
+    k = np.einsum("nd,hde->hne", x, w_k)
+    v = np.einsum("nd,hde->hne", x, w_v)
+
+    scores = q @ k.transpose(0, 2, 1) / np.sqrt(d_head)
+    causal = np.triu(np.ones((n, n), dtype=bool), k=1)
+    scores = np.where(causal[None, :, :], -np.inf, scores)
+    attn = _softmax(scores, axis=-1)                       # (heads, n, n)
+
+    row = attn[:, q_idx, :].mean(axis=0)                   # query → 각 토큰
+    context = np.concatenate([attn[h, q_idx] @ v[h] for h in range(num_heads)]) @ w_o
+
+    # next-token 분포: vocabulary 임베딩과 context(+ query 토큰)의 내적 → softmax
+    vocab_emb = np.stack([_token_vector(w, D_MODEL) for w in VOCAB])
+    logits = vocab_emb @ (context + x[q_idx]) * np.sqrt(D_MODEL)
+    probs = _softmax(logits)
+    top = np.argsort(-probs)[:TOP_K]
+    top_probs = probs[top] / probs[top].sum()
+
+    weights = [round(float(w), 3) for w in row]
+    cand_probs = [round(float(p), 3) for p in top_probs]
+    return {
+        "pattern_type": "seq_attention",
+        "raw_text": raw_text,
+        "tokens": tokens,
+        "weights": weights,
+        "query_index": q_idx,
+        "next_token": {
+            "candidates": [VOCAB[i] for i in top],
+            "probs": cand_probs,
+        },
+    }
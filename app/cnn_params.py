@@ -0,0 +1,140 @@
+# app/cnn_params.py
+import re
+from typing import Any, Dict, List, Optional, Set
+
+# DOMAIN_PROMPTS["cnn_param"] + GLOBAL RULES 의 기본값과 동일하게 맞춘다
+DEFAULT_PARAMS = {"stride": 1, "padding": 0, "seed": 1}
+REQUIRED_FIELDS = ("input_size", "kernel_size")
+FALLBACK_REQUIRED = {"input_size": 5, "kernel_size": 3}   # LLM을 쓸 수 없을 때만 채우는 값
+
+_SQ = r"(\d+)\s*[x×*X]\s*\1"          # 정사각 크기 "5x5", "3 × 3"
+_SEP = r"\s*(?:[:=]|\bof\b|는|은|가|이|를|을)?\s*"  # "kernel = 3", "커널은 3", "kernel of 3"
+_KERNEL = r"(?:kernel|커널|filter|필터)"
+_INPUT = r"(?:input|입력|matrix|행렬|image|이미지|grid|그리드)"
+
+FIELD_PATTERNS: Dict[str, List[str]] = {
+    "input_size": [
+        rf"{_SQ}\s*(?:크기의?\s*)?(?:짜리\s*)?{_INPUT}",             # "5x5 행렬", "4x4 input"
+        rf"{_INPUT}(?:\s*size|\s*크기)?{_SEP}(\d+)(?:\s*[x×*X]\s*\d+)?",  # "input size 5", "입력 크기는 5x5"
+    ],
+    "kernel_size": [
+        rf"{_SQ}\s*(?:크기의?\s*)?(?:짜리\s*)?{_KERNEL}",            # "3x3 커널"
+        rf"{_KERNEL}(?:\s*size|\s*크기)?{_SEP}(\d+)(?:\s*[x×*X]\s*\d+)?",  # "kernel size 3", "커널 3x3"
+        r"\bk\s*=\s*(\d+)",
+    ],
+    "stride": [
+        rf"(?:stride|스트라이드){_SEP}(\d+)",
+        r"\bs\s*=\s*(\d+)",
+    ],
+    "padding": [
+        rf"(?:padding|패딩){_SEP}(\d+)",
+        r"(\d+)\s*칸\s*(?:제로\s*)?(?:padding|패딩)",                 # "1칸 패딩"
+        r"(\d+)[-\s]*(?:pixel\s*|px\s*)?zero[-\s]*padding",         # "1-pixel zero padding"
+        r"\bp\s*=\s*(\d+)",
+    ],
+}
+
+NO_PADDING_RE = re.compile(r"no\s*padding|without\s*padding|valid\s*padding|패딩\s*(?:없이|없음|없는)", re.IGNORECASE)
+SAME_PADDING_RE = re.compile(r"same\s*padding|padding\s*=?\s*['\"]?same", re.IGNORECASE)
+
+# 값을 못 읽었어도 언급은 된 선택 필드 ("stride two", "2 stride") — 기본값으로 채우면 요청과 다른 그림이 된다
+STATED_FIELD_RES = {
+    "stride": re.compile(r"stride|스트라이드", re.IGNORECASE),
+    "padding": re.compile(r"padding|패딩", re.IGNORECASE),
+}
+
+# "pooling stride 2", "max pool with kernel 2" 처럼 pooling 층의 값은 conv 파라미터가 아니다
+POOL_RE = re.compile(r"pool(?:ing)?|풀링", re.IGNORECASE)
+CLAUSE_SEP_RE = re.compile(r"[,;.\n]|\band\b|\bthen\b|그리고|다음에", re.IGNORECASE)
+
+
+def _pooling_clause(text: str, pos: int) -> bool:
+    """pos가 속한 절(쉼표/and/그리고 등으로 나뉜 구간)에서 pos 앞에 pooling이 나왔는지."""
+    starts = [m.end() for m in CLAUSE_SEP_RE.finditer(text, 0, pos)]
+    return bool(POOL_RE.search(text, starts[-1] if starts else 0, pos))
+
+
+def _values(text: str, patterns: List[str]) -> Set[int]:
+    found: Set[int] = set()
+    for p in patterns:
+        for m in re.finditer(p, text, re.IGNORECASE):
+            if not _pooling_clause(text, m.start()):
+                found.add(int(m.group(1)))
+    return found
+
+
+def stated_values(user_text: str) -> Dict[str, Set[int]]:
+    """필드별로 요청에 적힌 값들 (pooling 절의 값은 제외). 비어 있으면 언급이 없는 것."""
+    return {field: _values(user_text, patterns) for field, patterns in FIELD_PATTERNS.items()}
+
+
+def _stated_without_value(user_text: str, field: str) -> bool:
+    """field가 (pooling 절 밖에서) 언급됐는지. no/same padding은 값을 정하는 표현이라 제외."""
+    text = user_text
+    if field == "padding":
+        text = SAME_PADDING_RE.sub(" ", NO_PADDING_RE.sub(" ", text))
+    return any(not _pooling_clause(text, m.start()) for m in STATED_FIELD_RES[field].finditer(text))
+
+
+def extract_cnn_params(user_text: str, fill_required: bool = False) -> Optional[Dict[str, int]]:
+    """
+    요청 문장에서 input_size / kernel_size / stride / padding 을 직접 읽는다.
+    필수 값이 없거나, 같은 필드에 서로 다른 값이 잡히거나, stride/padding을 언급했는데 값을 못 읽었거나,
+    조합이 불가능하면 None (→ LLM).
+    fill_required=True면 빠진 필수 값을 FALLBACK_REQUIRED로 채운다 (LLM 장애 시).
+    """
+    params: Dict[str, int] = {}
+    for field, vals in stated_values(user_text).items():
+        if len(vals) > 1:
+            return None            # 애매함: 어느 값인지 추정하지 않는다
+        if vals:
+            params[field] = vals.pop()
+
+    if any(f not in params and _stated_without_value(user_text, f) for f in STATED_FIELD_RES):
+        return None                # 언급은 했는데 값을 못 읽음: 기본값으로 추정하지 않는다
+
+    if fill_required:
+        for field, default in FALLBACK_REQUIRED.items():
+            params.setdefault(field, default)
+    if any(f not in params for f in REQUIRED_FIELDS):
+        return None
+
+    if "padding" not in params:
+        if SAME_PADDING_RE.search(user_text):
+            if params["kernel_size"] % 2 == 0:
+                return None
+            params["padding"] = (params["kernel_size"] - 1) // 2
+        elif NO_PADDING_RE.search(user_text):
+            params["padding"] = 0
+
+    for field, default in DEFAULT_PARAMS.items():
+        params.setdefault(field, default)
+
+    # 커널이 (패딩 포함) 입력보다 크거나 stride가 0이면 사용자가 의도한 값을 잘못 읽은 것
+    if params["stride"] < 1 or params["kernel_size"] < 1:
+        return None
+    if params["kernel_size"] > params["input_size"] + 2 * params["padding"]:
+        return None
+
+    return {
+        "input_size": params["input_size"],
+        "kernel_size": params["kernel_size"],
+        "stride": params["stride"],
+        "padding": params["padding"],
+        "seed": params["seed"],
+    }
+
+
+def local_cnn_param_ir(user_text: str, fill_required: bool = False) -> Optional[Dict[str, Any]]:
+    """call_llm_domain_ir("cnn_param", ...) 와 같은 형태의 문서. 못 읽으면 None."""
+    params = extract_cnn_params(user_text, fill_required=fill_required)
+    if params is None:
+        return None
+    return {
+        "ir": {
+            "metadata": {"domain": "cnn_param"},
+            "params": params,
+        },
+        "basename": "cnn_forward_param",
+        "out_format": "mp4",
+    }
@@ -0,0 +1,218 @@
+# app/code_gate.py
+import re
+import ast
+import inspect
+import builtins
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+# LLM이 만든 scene 코드가 쓸 수 있는 import (최상위 모듈 이름)
+ALLOWED_IMPORTS = {"manim", "math", "random", "numpy", "itertools", "collections", "functools", "json"}
+
+# 호출해도 되는 builtin. 나머지 builtin 호출(open, exec, eval, __import__, getattr ...)은 거부
+SAFE_BUILTINS = {
+    "abs", "all", "any", "bool", "dict", "divmod", "enumerate", "filter", "float", "int",
+    "isinstance", "len", "list", "map", "max", "min", "pow", "print", "range", "reversed",
+    "round", "set", "sorted", "str", "sum", "super", "tuple", "zip",
+}
+BUILTIN_NAMES = set(dir(builtins))
+
+# 이름만 나와도 거부 (from manim import * 로 딸려 들어오는 모듈 포함)
+FORBIDDEN_NAMES = {"os", "sys", "subprocess", "shutil", "socket", "pathlib", "importlib", "builtins"}
+
+# attribute 접근의 root가 모듈일 때 허용하지 않는 속성 (파일 IO / 저수준 모듈)
+BLOCKED_MODULE_ATTRS = {
+    "numpy": {
+        "save", "savez", "savez_compressed", "savetxt", "load", "loadtxt", "genfromtxt",
+        "fromfile", "fromregex", "memmap", "lib", "ctypeslib", "DataSource", "testing",
+        "f2py", "distutils", "show_config",
+    },
+}
+# root와 상관없이 거부하는 메서드 (ndarray.tofile / ndarray.dump 는 파일을 쓴다)
+BLOCKED_ATTRS = {"tofile", "dump"}
+# from manim import * 가 np를 같이 내보낸다
+DEFAULT_MODULE_ALIASES = {"np": "numpy"}
+
+SCENE_BASES = {"Scene", "MovingCameraScene", "ThreeDScene", "ZoomedScene"}
+MANIM_IMPORT = "from manim import *"
+
+
+class SceneCodeRejected(RuntimeError):
+    """정적 검사 / dry run을 통과하지 못한 생성 코드 (렌더하지 않는다)."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("generated scene rejected: " + "; ".join(errors[:5]))
+        self.errors = errors
+
+
+def _base_names(cls: ast.ClassDef) -> List[str]:
+    return [b.id if isinstance(b, ast.Name) else getattr(b, "attr", "") for b in cls.bases]
+
+
+def _scene_classes(tree: ast.Module) -> List[ast.ClassDef]:
+    return [n for n in tree.body if isinstance(n, ast.ClassDef) and set(_base_names(n)) & SCENE_BASES]
+
+
+@lru_cache(maxsize=1)
+def _manim_names() -> Set[str]:
+    """from manim import * 로 들어오는 이름 중 모듈이 아닌 것 (Circle, config, rate_functions ...)."""
+    try:
+        import manim
+    except ImportError:
+        return set()
+    return {n for n, v in vars(manim).items() if not n.startswith("_") and not inspect.ismodule(v)}
+
+
+def _module_aliases(tree: ast.Module) -> Dict[str, str]:
+    """코드 안의 import로 생긴 모듈 이름 → 최상위 모듈 ("np" → "numpy")."""
+    aliases = dict(DEFAULT_MODULE_ALIASES)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for a in node.names:
+                aliases[a.asname or a.name.split(".")[0]] = a.name.split(".")[0]
+    return aliases
+
+
+def _bound_names(tree: ast.Module) -> Set[str]:
+    """코드 안에서 직접 만든 이름 (변수, 인자, 함수/클래스, from-import)."""
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.ImportFrom):
+            names.update(a.asname or a.name for a in node.names if a.name != "*")
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+    return names
+
+
+def _config_root(target: ast.AST) -> bool:
+    """config.x / config["x"] / config.x.y 처럼 manim config를 가리키는 대입 대상인지."""
+    while isinstance(target, (ast.Attribute, ast.Subscript)):
+        target = target.value
+    return isinstance(target, ast.Name) and target.id == "config"
+
+
+def _attribute_error(
+    node: ast.Attribute, aliases: Dict[str, str], bound: Set[str], manim_names: Set[str]
+) -> Optional[str]:
+    if node.attr.startswith("_"):
+        return f"private attribute not allowed: {node.attr} (line {node.lineno})"
+    if node.attr in BLOCKED_ATTRS:
+        return f"attribute not allowed: {node.attr} (line {node.lineno})"
+    if not isinstance(node.value, ast.Name):
+        return None  # 체인의 가장 안쪽 Attribute에서만 root 검사
+
+    root = node.value.id
+    if root in bound and root not in aliases:
+        return None
+    module = aliases.get(root)
+    if module is not None:
+        if node.attr in BLOCKED_MODULE_ATTRS.get(module, ()):
+            return f"attribute not allowed: {root}.{node.attr} (line {node.lineno})"
+        return None
+    if root in SAFE_BUILTINS or root in manim_names:
+        return None
+    return f"attribute root not allowed: {root}.{node.attr} (line {node.lineno})"
+
+
+def static_errors(code: str, scene_name: str = "AlgorithmScene") -> List[str]:
+    """
+    AST 수준 검사: 문법, scene class / construct 존재, import / 호출 whitelist,
+    attribute 접근 (private 속성, root whitelist, numpy 파일 IO), 모듈을 값으로 넘기기, manim config 변경.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [f"syntax error at line {e.lineno}: {e.msg}"]
+
+    errors: List[str] = []
+    scene = next((c for c in _scene_classes(tree) if c.name == scene_name), None)
+    if scene is None:
+        errors.append(f"no class {scene_name}(Scene) at module level")
+    elif not any(isinstance(n, ast.FunctionDef) and n.name == "construct" for n in scene.body):
+        errors.append(f"{scene_name} has no construct(self)")
+
+    aliases = _module_aliases(tree)
+    bound = _bound_names(tree)
+    manim_names = _manim_names()
+    # 모듈 이름은 attribute 접근(np.zeros)의 root로만 쓸 수 있다 —
+    # "m = np" 처럼 값으로 넘기면 이후 m.save(...)를 root 검사로 막을 수 없다
+    attr_roots = {id(n.value) for n in ast.walk(tree) if isinstance(n, ast.Attribute)}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            roots = [a.name.split(".")[0] for a in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            roots = [(node.module or "").split(".")[0]]
+        else:
+            roots = []
+        errors += [f"import not allowed: {r} (line {node.lineno})" for r in roots if r not in ALLOWED_IMPORTS]
+        if isinstance(node, ast.ImportFrom):
+            blocked = BLOCKED_MODULE_ATTRS.get((node.module or "").split(".")[0], set())
+            errors += [
+                f"import not allowed: {node.module}.{a.name} (line {node.lineno})"
+                for a in node.names
+                if a.name.startswith("_") or a.name in blocked
+            ]
+
+        if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Delete)):
+            targets = node.targets if isinstance(node, (ast.Assign, ast.Delete)) else [node.target]
+            if any(_config_root(t) for t in targets):
+                errors.append(f"config assignment not allowed (line {node.lineno})")
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and _config_root(node.func.value):
+            errors.append(f"config method call not allowed (line {node.lineno})")
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            name = node.func.id
+            if name in BUILTIN_NAMES and name not in SAFE_BUILTINS:
+                errors.append(f"call not allowed: {name}() (line {node.lineno})")
+        elif isinstance(node, ast.Name) and node.id in FORBIDDEN_NAMES:
+            errors.append(f"name not allowed: {node.id} (line {node.lineno})")
+        elif (isinstance(node, ast.Name) and node.id in aliases and isinstance(node.ctx, ast.Load)
+              and id(node) not in attr_roots):
+            errors.append(f"module used as a value: {node.id} (line {node.lineno})")
+        elif isinstance(node, ast.Attribute):
+            error = _attribute_error(node, aliases, bound, manim_names)
+            if error:
+                errors.append(error)
+    return errors
+
+
+def repair_scene_code(code: str, scene_name: str = "AlgorithmScene") -> str:
+    """
+    흔한 실수만 기계적으로 고친다.
+    - ```python 펜스 제거
+    - from manim import * 누락 → 맨 앞에 추가
+    - Scene 하위 class가 하나뿐인데 이름이 다르면 scene_name으로 변경
+    """
+    code = code.replace("```python", "").replace("```", "").strip() + "\n"
+    if MANIM_IMPORT not in code:
+        code = f"{MANIM_IMPORT}\n\n{code}"
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code
+    scenes = _scene_classes(tree)
+    if len(scenes) == 1 and scenes[0].name != scene_name:
+        code = re.sub(rf"\b{re.escape(scenes[0].name)}\b", scene_name, code)
+    return code
+
+
+def check_scene_code(code: str, scene_name: str = "AlgorithmScene") -> str:
+    """repair 후 정적 검사. 통과하면 (고쳐진) 코드, 아니면 SceneCodeRejected."""
+    repaired = repair_scene_code(code, scene_name)
+    errors = static_errors(repaired, scene_name)
+    if errors:
+        raise SceneCodeRejected(errors)
+    if repaired.strip() != code.strip():
+        print("🔧 generated scene repaired before render")
+    return repaired
+
+
+def validate_scene_code(code: str) -> List[str]:
+    """model_router 검증기 형태 (오류 리스트)."""
+    return static_errors(repair_scene_code(code))
@@ -0,0 +1,81 @@
+# app/domain_classifier.py
+import os
+import re
+import math
+from typing import Dict, List, Tuple
+
+# 이 값 이상이면 LLM 분류(call_llm_detect_domain)를 건너뛴다
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.6"))
+STRONG_WEIGHT = 2.0        # 이 가중치의 표현은 혼자서도 도메인을 확정할 수 있다
+WEAK_EVIDENCE_CAP = 0.5    # 강한 표현 없이 규칙 하나만 맞으면 confidence 상한 (threshold 아래)
+
+# DOMAIN_SYSTEM_PROMPT의 분류 규칙을 한국어+영어 정규식으로 옮긴 것.
+# (pattern, weight): 도메인을 거의 확정하는 표현은 2, 다른 도메인에도 나올 수 있는 표현은 1
+DOMAIN_RULES: Dict[str, List[Tuple[str, float]]] = {
+    "cnn_param": [
+        (r"(?<![a-z])cnns?(?![a-z])|convolution|conv\s*layer|합성곱|컨볼루션", 2.0),
+        (r"kernel|커널|filter|필터", 1.5),
+        (r"stride|스트라이드|padding|패딩|feature\s*map|피처\s*맵|pooling|풀링", 1.0),
+    ],
+    "sorting": [
+        (r"(bubble|selection|insertion|merge|quick|heap)\s*sort|quicksort|heapsort", 2.0),
+        (r"(버블|선택|삽입|병합|합병|퀵|힙)\s*정렬", 2.0),
+        (r"\bsort(ing|ed)?\b|정렬|오름차순|내림차순", 1.5),
+        (r"\barray\b|배열|\[\s*-?\d+(\s*,\s*-?\d+)+\s*\]", 1.0),
+    ],
+    "transformer": [
+        (r"transformer|트랜스포머|self[-\s]?attention|셀프\s*어텐션|multi[-\s]?head", 2.0),
+        (r"next[-\s]?token|다음\s*토큰|query\s*/\s*key|\bqkv\b|쿼리|attention\s*head", 2.0),
+        (r"attention|어텐션|token|토큰", 1.0),
+    ],
+    "cache": [
+        (r"\blru\b|\bfifo\b|\blfu\b|s3-?fifo|eviction|evict|캐시\s*교체", 2.0),
+        (r"cache|캐시|queue|큐|축출", 1.0),
+    ],
+    "math": [
+        (r"derivative|integral|미분|적분|expectation|기댓값|variance|분산", 2.0),
+        (r"probability|확률|gradient|기울기", 1.0),
+        (r"matri(x|ces)|행렬", 0.5),   # CNN 입력("5x5 행렬")에도 자주 나온다
+    ],
+}
+
+_COMPILED = {
+    domain: [(re.compile(p, re.IGNORECASE), w) for p, w in rules]
+    for domain, rules in DOMAIN_RULES.items()
+}
+
+
+def domain_hits(text: str) -> Dict[str, List[float]]:
+    """도메인별로 매칭된 규칙의 가중치 목록."""
+    return {
+        domain: [w for rx, w in rules if rx.search(text)]
+        for domain, rules in _COMPILED.items()
+    }
+
+
+def domain_scores(text: str) -> Dict[str, float]:
+    """도메인별 매칭 가중치 합."""
+    return {domain: sum(ws) for domain, ws in domain_hits(text).items()}
+
+
+def classify_domain(text: str) -> Tuple[str, float]:
+    """
+    (domain, confidence) 반환. confidence ∈ [0, 1]
+    - 근거의 양: 1 - exp(-best)     (강한 키워드 하나면 ~0.86)
+    - 애매함:   best / (best + second)  (두 도메인이 비슷하면 깎인다)
+    - 강한 표현(STRONG_WEIGHT) 없이 규칙 하나만 맞으면 WEAK_EVIDENCE_CAP으로 제한
+      ("kernel of a linear map", "token bucket", "큐 자료구조" 같은 다른 뜻의 단어 하나로 확정하지 않도록)
+    매칭이 하나도 없으면 ("generic", 0.0) → 호출부가 LLM으로 넘긴다.
+    """
+    hits = domain_hits(text)
+    scores = {domain: sum(ws) for domain, ws in hits.items()}
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    (best_domain, best), (_, second) = ranked[0], ranked[1]
+    if best <= 0:
+        return "generic", 0.0
+
+    confidence = (1.0 - math.exp(-best)) * (best / (best + second))
+    best_hits = hits[best_domain]
+    if max(best_hits) < STRONG_WEIGHT and len(best_hits) < 2:
+        confidence = min(confidence, WEAK_EVIDENCE_CAP)
+    return best_domain, round(confidence, 3)
@@ -0,0 +1,114 @@
+# app/jobs.py
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))          # 동시에 실행되는 파이프라인 수
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "8"))    # 실행 대기 가능한 job 수
+JOB_TTL_SEC = int(os.getenv("JOB_TTL_SEC", "3600"))       # 완료된 job 결과 보관 시간
+
+
+class QueueFullError(RuntimeError):
+    """대기열이 가득 차서 job을 받을 수 없을 때 발생. retry_after(초)를 함께 전달."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    bounded background executor.
+    - 실행 중(workers) + 대기(max_pending)를 합친 만큼만 job을 받는다.
+    - 넘치면 QueueFullError → API에서 429 + Retry-After로 변환.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_SIZE,
+                 ttl_sec: int = JOB_TTL_SEC):
+        self.workers = max(1, workers)
+        self.ttl_sec = ttl_sec
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._slots = threading.BoundedSemaphore(self.workers + max(0, max_pending))
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._durations = deque(maxlen=20)  # 최근 job 소요 시간 (Retry-After 추정용)
+
+    # ---------- 제출 / 조회 ----------
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args: Any) -> str:
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(self.retry_after())
+
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+        try:
+            self._executor.submit(self._run, job_id, fn, args)
+        except RuntimeError:
+            # executor가 이미 shutdown 된 경우
+            self._slots.release()
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            raise
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def retry_after(self) -> int:
+        """최근 평균 소요 시간 × (대기 job 수 / worker 수) 로 대략적인 대기 시간을 추정."""
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j["status"] in ("queued", "running"))
+            avg = sum(self._durations) / len(self._durations) if self._durations else 30.0
+        return max(1, int(avg * pending / self.workers))
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ---------- 내부 ----------
+    def _run(self, job_id: str, fn: Callable[..., Dict[str, Any]], args: tuple):
+        started = time.time()
+        self._update(job_id, status="running", started_at=started)
+        try:
+            result = fn(*args)
+            self._update(job_id, status="succeeded", result=result)
+        except Exception as e:
+            print(f"🔥 job {job_id} failed:", e)
+            self._update(job_id, status="failed", error=str(e))
+        finally:
+            finished = time.time()
+            self._update(job_id, finished_at=finished)
+            with self._lock:
+                self._durations.append(finished - started)
+            self._slots.release()
+
+    def _update(self, job_id: str, **fields: Any):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _prune(self):
+        """TTL이 지난 완료 job 정리 (lock 잡은 상태에서 호출)."""
+        now = time.time()
+        expired = [
+            jid for jid, j in self._jobs.items()
+            if j["finished_at"] is not None and now - j["finished_at"] > self.ttl_sec
+        ]
+        for jid in expired:
+            del self._jobs[jid]
@@ -1,4 +1,8 @@
 from manim import *
+import os
+import time
+import threading
+from collections import OrderedDict
 from typing import List, Tuple, Dict, Optional
 
 # === 1. 기본 색상 / 스타일 프리셋 ===
@@ -37,7 +41,7 @@ def create_box_node(
         fill_color=fill_color,
         fill_opacity=0.3,
     )
-    label = Text(text, font_size=font_size, color=text_color)
+    label = cached_text(text, font_size=font_size, color=text_color)
     label.move_to(box.get_center())
     return VGroup(box, label)
 
@@ -57,7 +61,7 @@ def create_circle_node(
         fill_color=fill_color,
         fill_opacity=0.3,
     )
-    label = Text(text, font_size=font_size, color=text_color)
+    label = cached_text(text, font_size=font_size, color=text_color)
     label.move_to(circ.get_center())
     return VGroup(circ, label)
 
@@ -240,3 +244,147 @@ class LayoutMixin:
         edge_group = VGroup(*arrows)
         self.add(edge_group)
         return edge_group
+
+
+# === 9. Text mobject 캐시 (Pango/SVG parse 1회 → 이후 copy) ===
+
+TEXT_CACHE_SIZE = int(os.getenv("TEXT_CACHE_SIZE", "512"))
+
+
+class TextFactory:
+    """
+    (text, font, font_size, color, 기타 kwargs) → prototype Text를 LRU로 보관하고 .copy()를 내준다.
+    render worker는 여러 요청을 연달아 렌더하므로 "Input", 숫자 0-9, 인덱스 라벨 같은 글자는 한 번만 만든다.
+    hashable하지 않은 kwargs(t2c dict 등)는 캐시 없이 바로 Text.
+    """
+
+    def __init__(self, maxsize: int = TEXT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._protos: "OrderedDict[tuple, Text]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.build_sec = 0.0   # miss 때 Text 생성에 쓴 시간
+        self.copy_sec = 0.0    # hit 때 copy에 쓴 시간
+
+    def get(self, text: str, font_size: float = 24, color=WHITE, font: str = "", **kwargs) -> Text:
+        try:
+            key = (text, font, float(font_size), str(color), tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return Text(text, font_size=font_size, color=color, font=font, **kwargs)
+
+        with self._lock:
+            proto = self._protos.get(key)
+            if proto is not None:
+                self._protos.move_to_end(key)
+        if proto is not None:
+            t0 = time.perf_counter()
+            out = proto.copy()
+            with self._lock:
+                self.hits += 1
+                self.copy_sec += time.perf_counter() - t0
+            return out
+
+        t0 = time.perf_counter()
+        proto = Text(text, font_size=font_size, color=color, font=font, **kwargs)
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.misses += 1
+            self.build_sec += elapsed
+            self._protos[key] = proto
+            while len(self._protos) > self.maxsize:
+                self._protos.popitem(last=False)
+        return proto.copy()
+
+    def clear(self):
+        with self._lock:
+            self._protos.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_build = self.build_sec / self.misses if self.misses else 0.0
+            return {
+                "size": len(self._protos),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "build_sec": round(self.build_sec, 3),
+                # hit마다 새로 만들었으면 들었을 시간(평균 생성 시간) - 실제 copy 시간
+                "saved_sec_est": round(max(0.0, self.hits * avg_build - self.copy_sec), 3),
+            }
+
+
+text_factory = TextFactory()
+
+
+def cached_text(text: str, font_size: float = 24, color=WHITE, **kwargs) -> Text:
+    """Text(...) 대신 쓰는 캐시 버전. 반환값은 매번 새 copy라 자유롭게 이동/변형해도 된다."""
+    return text_factory.get(text, font_size=font_size, color=color, **kwargs)
+
+
+# === 10. 숫자 glyph atlas (숫자 라벨마다 LaTeX 돌리지 않기) ===
+
+NUMBER_GLYPHS = "0123456789-."
+GLYPH_BUFF_PER_FONT_UNIT = 0.001   # manim DecimalNumber와 같은 자간 (font_size 48 → 0.048)
+
+
+class NumberTex(VGroup):
+    """glyph atlas에서 조립한 숫자 라벨. MathTex(str(n))와 같은 크기/모양 (isinstance 구분용 타입)."""
+
+
+class GlyphAtlas:
+    """
+    숫자/부호/소수점 glyph를 MathTex로 한 번씩만 만들어 두고(LaTeX 12회, 이후 디스크 캐시),
+    임의의 정수/소수는 glyph copy를 DecimalNumber 방식으로 이어 붙여 만든다 → 요청당 LaTeX 0회.
+    atlas에 없는 문자가 섞이면 그냥 MathTex.
+    """
+
+    def __init__(self, glyphs: str = NUMBER_GLYPHS):
+        self.glyph_chars = glyphs
+        self._glyphs: Optional[Dict[str, MathTex]] = None
+        self._lock = threading.Lock()
+        self.composed = 0
+        self.fallbacks = 0
+
+    def _atlas(self) -> Dict[str, MathTex]:
+        # manim config(tex_dir 등)가 준비된 뒤 첫 사용 시점에 만든다
+        with self._lock:
+            if self._glyphs is None:
+                self._glyphs = {c: MathTex(c) for c in self.glyph_chars}
+            return self._glyphs
+
+    def warm(self) -> int:
+        return len(self._atlas())
+
+    def number(self, value) -> VGroup:
+        text = value if isinstance(value, str) else str(value)
+        glyphs = self._atlas()
+        if not text or any(c not in glyphs for c in text):
+            self.fallbacks += 1
+            return MathTex(text)
+
+        parts = [glyphs[c].copy() for c in text]
+        group = NumberTex(*parts)
+        group.arrange(RIGHT, buff=GLYPH_BUFF_PER_FONT_UNIT * DEFAULT_FONT_SIZE, aligned_edge=DOWN)
+        # 마이너스는 바닥이 아니라 다음 숫자의 가운데 높이에 (DecimalNumber와 동일)
+        for i, c in enumerate(text[:-1]):
+            if c == "-":
+                parts[i].align_to(parts[i + 1], UP)
+                parts[i].shift(parts[i + 1].height * DOWN / 2)
+        group.move_to(ORIGIN)
+        self.composed += 1
+        return group
+
+    def stats(self) -> Dict[str, int]:
+        return {"composed": self.composed, "fallbacks": self.fallbacks}
+
+
+glyph_atlas = GlyphAtlas()
+
+
+def number_tex(value) -> VGroup:
+    """MathTex(str(value)) 대신 쓰는 숫자 라벨 (예: number_tex(acc), number_tex(f"{w:.2f}"))."""
+    return glyph_atlas.number(value)
@@ -1,14 +1,18 @@
 # app/llm.py
-import os, json
+import json
 from typing import Dict, Any, List, Tuple
-from dotenv import load_dotenv
-from openai import OpenAI
-from app.schema import schema_errors, invariants_errors, validate_attention_ir  # 검증은 기존 함수 재사용:contentReference[oaicite:2]{index=2}
+from app.schema import schema_errors, invariants_errors, validate_attention_ir, validate_sorting_trace_ir, validate_cnn_param_ir  # 검증은 기존 함수 재사용:contentReference[oaicite:2]{index=2}
+from app.schema import (
+    strip_nulls, SORTING_TRACE_FORMAT, CNN_PARAM_IR_FORMAT,
+    ATTENTION_IR_FORMAT, ATTENTION_SENTENCE_FORMAT,
+)
 from app.prompts import DOMAIN_PROMPTS
 from app.patterns import PatternType
+from app.llm_gateway import LLMUnavailableError
+from app.sorting_trace import trace_to_json_ir
+from app.model_router import model_router
+from app.attention_engine import extract_sentence, fallback_sentence, compute_attention_ir
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # ---------- Stage 1: 이해·예시·trace ----------
 STAGE1_SYSTEM = """You are an algorithm explainer. Output ONLY JSON."""
@@ -32,90 +36,109 @@ TEXT:
 {user_text}
 """.strip()
 
-def call_llm_stage1(user_text: str) -> Dict[str, Any]:
-    prompt = build_prompt_stage1(user_text)
-    resp = client.chat.completions.create(
-        model="gpt-5",  
-        response_format={"type": "json_object"},
-        messages=[{"role": "system", "content": STAGE1_SYSTEM},
-                  {"role": "user", "content": prompt}],
-    )
-    return json.loads(resp.choices[0].message.content)
+def _stage1_request(user_text: str) -> Dict[str, Any]:
+    return {
+        "stage": "stage1",
+        "response_format": SORTING_TRACE_FORMAT,
+        "messages": [{"role": "system", "content": STAGE1_SYSTEM},
+                     {"role": "user", "content": build_prompt_stage1(user_text)}],
+    }
 
-# ---------- Stage 2: trace → IR ----------
-STAGE2_SYSTEM = """You convert a trace JSON into an animation-ready IR. Output ONLY JSON with exactly three top-level keys: components, events, metadata."""
+def parse_structured(content: str) -> Dict[str, Any]:
+    """strict json_schema 출력 파싱: optional 필드 자리의 null은 뺀다."""
+    return strip_nulls(json.loads(content))
 
+def call_llm_stage1(user_text: str) -> Dict[str, Any]:
+    return model_router.complete(_stage1_request(user_text), parse=parse_structured,
+                                 validate=validate_sorting_trace_ir)
 
-def build_prompt_stage2(explain_json: Dict[str, Any]) -> str:
-    return f"""
-Convert the following trace JSON into an animation IR.
-
-Rules:
-- Output must have three top-level keys: components[], events[], metadata{{}}.
-- Make one component per input item: ids "arr0","arr1",... label is current value (string)
-- For each trace step:
-  - Emit: {{"t": T, "op": "compare", "from": "arr<i>", "to": "arr<j>"}}
-  - If swap==true, also emit: {{"t": T+0.2, "op": "swap", "from": "arr<i>", "to": "arr<j>"}}
-- Use non-decreasing t (start 0.0, step 0.2)
-- metadata.view = "flow"; metadata.domain = input.metadata.domain
-
-TRACE JSON:
-{json.dumps(explain_json, ensure_ascii=False)}
-"""
-
-
-def call_llm_stage2(explain_json: Dict[str, Any], temperature: float = 0.0) -> Dict[str, Any]:
-    prompt = build_prompt_stage2(explain_json)
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        temperature=temperature,
-        response_format={"type": "json_object"},
-        messages=[{"role": "system", "content": STAGE2_SYSTEM},
-                  {"role": "user", "content": prompt}],
-    )
-    return json.loads(resp.choices[0].message.content)
+async def acall_llm_stage1(user_text: str) -> Dict[str, Any]:
+    return await model_router.acomplete(_stage1_request(user_text), parse=parse_structured,
+                                        validate=validate_sorting_trace_ir)
+
+# ---------- Stage 2: trace → IR (로컬) ----------
+# trace → components/events 변환은 규칙이 완전히 정해져 있어서 LLM 대신 sorting_trace.trace_to_json_ir 로 한다.
 
 # ---------- Validation wrapper ----------
 def validate_ir(doc: Dict[str, Any]) -> List[str]:
     """schema + invariants 오류 리스트를 반환 (빈 리스트면 통과)."""
     return schema_errors(doc) + invariants_errors(doc)
 
-def call_llm_json_ir(user_text: str, temperature: float = 0.0):
+def call_llm_json_ir(user_text: str):
     """
     [호환용] 옛 함수 이름을 유지하되, 내부적으로
-    1) stage1(설명+예시+trace) → 2) stage2(trace→IR) 를 호출해서 IR을 만든다.
+    1) stage1(설명+예시+trace, LLM) → 2) trace_to_json_ir(로컬) 로 IR을 만든다.
     기존 호출부가 (dict, raw_str) 를 기대하므로 그대로 반환.
     """
-    explain = call_llm_stage1(user_text, temperature=temperature)
-    ir = call_llm_stage2(explain, temperature=temperature)
+    explain = call_llm_stage1(user_text)
+    ir = trace_to_json_ir(explain)
     raw = json.dumps(ir, ensure_ascii=False)
     return ir, raw
 
-def generate_ir_with_validation(user_text: str, max_retries_zero_temp: int = 2) -> Dict[str, Any]:
+async def acall_llm_json_ir(user_text: str):
+    explain = await acall_llm_stage1(user_text)
+    ir = trace_to_json_ir(explain)
+    raw = json.dumps(ir, ensure_ascii=False)
+    return ir, raw
+
+def _feedback(errs: List[str]) -> str:
+    # 구체적 피드백 생성
+    bullets = "\n".join(f"- {e}" for e in errs)
+    return f"Correct these issues:\n{bullets}\nReturn valid JSON only."
+
+def _with_feedback(user_text: str, feedback: str) -> str:
+    return user_text + ("\n\n" + feedback if feedback else "")
+
+def generate_ir_with_validation(user_text: str, max_retries: int = 1) -> Dict[str, Any]:
     """
-    1) temp=0으로 시도 → 검증 실패 시 피드백 첨부 재시도
-    2) 그래도 실패하면 temp=0.3으로 한 번 더
+    LLM은 stage1(trace) 한 번뿐이고, trace가 의미 검증(배열 상태 / index)에 실패할 때만
+    피드백을 붙여 stage1을 다시 요청한다. trace → IR 변환은 로컬이라 invariants 오류가 생기지 않는다.
     """
     feedback = ""
-    for attempt in range(max_retries_zero_temp + 1):
-        doc, raw = call_llm_json_ir(user_text + ("\n\n" + feedback if feedback else ""), temperature=0.0)
-        errs = schema_errors(doc) + invariants_errors(doc)
+    for attempt in range(max_retries + 1):
+        explain = call_llm_stage1(_with_feedback(user_text, feedback))
+        errs = validate_sorting_trace_ir(explain)
         if not errs:
-            return doc
-        # 구체적 피드백 생성
-        bullets = "\n".join(f"- {e}" for e in errs)
-        feedback = f"Correct these issues:\n{bullets}\nReturn valid JSON only."
-
-    # fallback: temperature 높여서 다양성 확보
-    doc, raw = call_llm_json_ir(user_text + ("\n\n" + feedback if feedback else ""), temperature=0.3)
-    errs = schema_errors(doc) + invariants_errors(doc)
-    if errs:
-        raise ValueError("LLM JSON IR generation failed:\n" + "\n".join(errs))
-    return doc
+            return trace_to_json_ir(explain)
+        feedback = _feedback(errs)
+    raise ValueError("LLM JSON IR generation failed:\n" + "\n".join(errs))
+
+async def agenerate_ir_with_validation(user_text: str, max_retries: int = 1) -> Dict[str, Any]:
+    """generate_ir_with_validation 의 async 버전 (재시도는 앞 결과에 의존하므로 순차)."""
+    feedback = ""
+    for attempt in range(max_retries + 1):
+        explain = await acall_llm_stage1(_with_feedback(user_text, feedback))
+        errs = validate_sorting_trace_ir(explain)
+        if not errs:
+            return trace_to_json_ir(explain)
+        feedback = _feedback(errs)
+    raise ValueError("LLM JSON IR generation failed:\n" + "\n".join(errs))
 
 # ---------- Domain-level IR Generator ----------
-def call_llm_domain_ir(domain: str, user_text: str, temperature: float = 0.0) -> Dict[str, Any]:
-    """도메인 이름에 맞는 프롬프트 템플릿을 이용해 IR 생성"""
+# ✅ 전 도메인 공통 규칙: 사용자의 수치, 조건, 표현을 절대 변경하지 말 것
+DOMAIN_GLOBAL_RULES = """
+<GLOBAL RULES>
+- 절대로 사용자의 수치값(예: 3x3, 2, stride=1, 0.01, learning rate 등)을 수정하거나 보정하지 말라.
+- padding, stride, kernel_size, input_size, epoch, batch_size, temperature 등
+  모든 하이퍼파라미터는 사용자가 언급한 값을 그대로 사용해야 한다.
+- 사용자가 명시하지 않은 값만 기본값으로 채운다.
+- input_size는 padding을 포함하지 않는다. padding은 별도의 값으로만 사용된다.
+- 기본값은 도메인별 상식적인 값으로 설정하되, "추정"하지 않는다. (예: CNN은 stride=1, padding=0, seed=1)
+- 출력 JSON은 오직 요청된 도메인에 필요한 필드만 포함해야 한다.
+- 출력은 항상 완전한 JSON 객체로 반환해야 하며, 문자열이나 설명문이 포함되어서는 안 된다.
+</GLOBAL RULES>
+""".strip()
+
+# 도메인별 strict 출력 스키마 (없는 도메인은 json_object)
+DOMAIN_IR_FORMATS = {
+    "cnn_param": CNN_PARAM_IR_FORMAT,
+    "sorting_trace": SORTING_TRACE_FORMAT,
+    "seq_attention": ATTENTION_IR_FORMAT,
+    "attention_sentence": ATTENTION_SENTENCE_FORMAT,
+}
+
+def _domain_ir_request(domain: str, user_text: str) -> Dict[str, Any]:
+    """도메인 이름에 맞는 프롬프트 템플릿으로 chat.completions 요청 인자를 만든다."""
     if domain not in DOMAIN_PROMPTS:
         raise ValueError(f"Unknown domain: {domain}")
 
@@ -124,48 +147,98 @@ def call_llm_domain_ir(domain: str, user_text: str, temperature: float = 0.0) ->
         base_prompt = prompt_cfg["template"].replace("{text}", user_text)
     else:
         base_prompt = prompt_cfg["template"].format(text=user_text)
-        
-    # ✅ 전 도메인 공통 규칙: 사용자의 수치, 조건, 표현을 절대 변경하지 말 것
-    universal_rules = """
-    <GLOBAL RULES>
-    - 절대로 사용자의 수치값(예: 3x3, 2, stride=1, 0.01, learning rate 등)을 수정하거나 보정하지 말라.
-    - padding, stride, kernel_size, input_size, epoch, batch_size, temperature 등
-      모든 하이퍼파라미터는 사용자가 언급한 값을 그대로 사용해야 한다.
-    - 사용자가 명시하지 않은 값만 기본값으로 채운다.
-    - input_size는 padding을 포함하지 않는다. padding은 별도의 값으로만 사용된다.
-    - 기본값은 도메인별 상식적인 값으로 설정하되, "추정"하지 않는다. (예: CNN은 stride=1, padding=0, seed=1)
-    - 출력 JSON은 오직 요청된 도메인에 필요한 필드만 포함해야 한다.
-    - 출력은 항상 완전한 JSON 객체로 반환해야 하며, 문자열이나 설명문이 포함되어서는 안 된다.
-    </GLOBAL RULES>
-    """
 
-    # ✅ 도메인별 템플릿에 공통 규칙 주입
-    full_prompt = base_prompt + "\n\n" + universal_rules
-
-    # ✅ LLM 호출
-    resp = client.chat.completions.create(
-        model="gpt-5",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": prompt_cfg["system"]},
-            {"role": "user", "content": full_prompt},
+    # 공통 규칙은 system 쪽에 둬서 사용자 문장 앞의 prefix가 요청마다 같게 한다
+    return {
+        "stage": f"domain_ir:{domain}",
+        "response_format": DOMAIN_IR_FORMATS.get(domain, {"type": "json_object"}),
+        "messages": [
+            {"role": "system", "content": prompt_cfg["system"] + "\n\n" + DOMAIN_GLOBAL_RULES},
+            {"role": "user", "content": base_prompt},
         ],
-    )
+    }
+
 
+def _parse_domain_ir(content: str) -> Dict[str, Any]:
     print("\n=== 🧠 LLM RAW OUTPUT ===")
-    print(resp.choices[0].message.content)
+    print(content)
     print("=========================\n")
 
-    return json.loads(resp.choices[0].message.content)
+    return parse_structured(content)
 
 
-def call_llm_attention_ir(user_text: str) -> dict:
-    # 도메인은 pattern과 1:1로 맞춘다
-    raw = call_llm_domain_ir("seq_attention", user_text)
-    # raw가 바로 attn_ir라고 가정 (프롬프트를 그렇게 짰으니까)
-    attn_ir = raw
+def _validate_sentence(doc: Dict[str, Any]) -> List[str]:
+    raw = doc.get("raw_text")
+    return [] if isinstance(raw, str) and raw.split() else ["raw_text must be a non-empty string"]
+
+
+# 도메인 IR 검증기: 통과하지 못하면 router가 큰 모델로 다시 요청한다
+DOMAIN_IR_VALIDATORS = {
+    "cnn_param": validate_cnn_param_ir,
+    "sorting_trace": validate_sorting_trace_ir,
+    "seq_attention": validate_attention_ir,
+    "attention_sentence": _validate_sentence,
+}
+
+
+def call_llm_domain_ir(domain: str, user_text: str) -> Dict[str, Any]:
+    """도메인 이름에 맞는 프롬프트 템플릿을 이용해 IR 생성 (동일 프롬프트면 cache에서 바로 반환)"""
+    request = _domain_ir_request(domain, user_text)
+    return model_router.complete(request, parse=_parse_domain_ir, validate=DOMAIN_IR_VALIDATORS.get(domain))
+
+
+async def acall_llm_domain_ir(domain: str, user_text: str) -> Dict[str, Any]:
+    request = _domain_ir_request(domain, user_text)
+    return await model_router.acomplete(request, parse=_parse_domain_ir, validate=DOMAIN_IR_VALIDATORS.get(domain))
+
+
+def _attention_ir_from_sentence(raw_text: str, degraded: bool = False) -> dict:
+    attn_ir = compute_attention_ir(raw_text)
+    if degraded:
+        attn_ir["metadata"] = {"degraded": True}   # LLM 없이 고른 문장 → semantic cache에 남기지 않는다
 
     errors = validate_attention_ir(attn_ir)
     if errors:
         raise ValueError(f"attention IR validation failed: {errors}")
-    return attn_ir
\ No newline at end of file
+    return attn_ir
+
+
+def _sentence_from_extraction(extracted: Dict[str, Any], user_text: str) -> str:
+    return (extracted.get("raw_text") or "").strip() or user_text
+
+
+def _fallback_attention_sentence(user_text: str, error: Exception) -> str:
+    raw_text = fallback_sentence(user_text)
+    print(f"⚠️ LLM unavailable ({error}), using sentence: {raw_text!r}")
+    return raw_text
+
+
+def call_llm_attention_ir(user_text: str) -> dict:
+    """
+    seq_attention IR 생성.
+    weights / next_token 은 attention_engine이 로컬에서 계산하고(같은 문장 → 항상 같은 수치),
+    LLM은 입력 문장을 패턴으로 찾지 못했을 때 문장 추출에만 쓴다.
+    """
+    raw_text = extract_sentence(user_text)
+    degraded = False
+    if raw_text is None:
+        try:
+            extracted = call_llm_domain_ir("attention_sentence", user_text)
+            raw_text = _sentence_from_extraction(extracted, user_text)
+        except LLMUnavailableError as e:
+            raw_text = _fallback_attention_sentence(user_text, e)
+            degraded = True
+    return _attention_ir_from_sentence(raw_text, degraded)
+
+
+async def acall_llm_attention_ir(user_text: str) -> dict:
+    raw_text = extract_sentence(user_text)
+    degraded = False
+    if raw_text is None:
+        try:
+            extracted = await acall_llm_domain_ir("attention_sentence", user_text)
+            raw_text = _sentence_from_extraction(extracted, user_text)
+        except LLMUnavailableError as e:
+            raw_text = _fallback_attention_sentence(user_text, e)
+            degraded = True
+    return _attention_ir_from_sentence(raw_text, degraded)
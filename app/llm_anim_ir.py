@@ -1,10 +1,8 @@
 # app/llm_anim_ir.py
-import os, json
-from openai import OpenAI
-from dotenv import load_dotenv
+from app.llm_gateway import prompt_json
+from app.model_router import model_router
+from app.schema import validate_anim_ir
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 SYSTEM_PROMPT = """You are an animation structure planner.
 Convert a pseudocode JSON into a structured animation representation
@@ -12,15 +10,18 @@ that describes what entities to draw, where to place them, and how to animate ea
 
 Your output must be ONLY JSON with these fields:
 - metadata: { domain, title }
-- layout: list of { id, shape, position: [x, y], color (optional) }
-- actions: list of { step, target, animation, description }
+- layout: list of { id, shape, position: [x, y], label, color (optional) }
+- actions: list of { step, target, animation, description, to (optional), item (optional) }
 
 Guidelines:
 - Use domain to infer typical layout:
   - cache: S-FIFO, M-FIFO, G aligned vertically
   - cnn_param: matrices left→right (input → fmap → pool)
   - sorting: array elements aligned horizontally
-- animation types: "fade_in", "move", "highlight", "swap", "fade_out"
+- animation types (use ONLY these): "fade_in", "fade_out", "highlight", "compare", "swap", "move", "enqueue", "evict", "flow"
+  - compare / swap / flow: target is a list of two layout ids [a, b]
+  - move: target is a layout id, plus "to" (another layout id) or "position": [x, y]
+  - enqueue / evict: target is the container id, "item" is the short label of the element
 - Coordinates in range [-5, 5]
 - Be consistent with pseudocode steps.
 - Output valid JSON only."""
@@ -29,19 +30,26 @@ def build_prompt_anim_ir(pseudocode_json: dict) -> str:
     return f"""
 Convert the following pseudocode into a structured animation plan JSON:
 
-{json.dumps(pseudocode_json, ensure_ascii=False, indent=2)}
+{prompt_json(pseudocode_json)}
 """
 
-def call_llm_anim_ir(pseudocode_json: dict):
-    prompt = build_prompt_anim_ir(pseudocode_json)
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
+def _anim_ir_request(pseudocode_json: dict) -> dict:
+    return {
+        "stage": "anim_ir",
+        "response_format": {"type": "json_object"},
+        "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
+            {"role": "user", "content": build_prompt_anim_ir(pseudocode_json)},
         ],
-    )
-    return json.loads(resp.choices[0].message.content)
+    }
+
+def _domain_of(doc: dict):
+    return (doc.get("metadata") or {}).get("domain")
 
+def call_llm_anim_ir(pseudocode_json: dict):
+    return model_router.complete(_anim_ir_request(pseudocode_json), validate=validate_anim_ir,
+                                 domain=_domain_of(pseudocode_json))
 
+async def acall_llm_anim_ir(pseudocode_json: dict):
+    return await model_router.acomplete(_anim_ir_request(pseudocode_json), validate=validate_anim_ir,
+                                        domain=_domain_of(pseudocode_json))
@@ -0,0 +1,129 @@
+# app/llm_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3"))
+LLM_CACHE_TTL_SEC = int(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]],
+              response_format: Optional[Dict[str, Any]] = None,
+              temperature: Optional[float] = None) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,   # system prompt + user prompt
+            "response_format": response_format,
+            "temperature": temperature,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    chat.completions 응답을 SQLite 파일에 저장하는 cache.
+    - WAL 모드라서 여러 uvicorn worker 프로세스가 같은 파일을 공유해도 안전
+    - TTL 지난 항목은 miss 처리, 항목 수가 max_entries를 넘으면 오래 안 쓴 것부터 삭제
+    - hit/miss 카운터도 DB에 저장 → 모든 worker 합산 통계
+    """
+
+    def __init__(self, path: Path = LLM_CACHE_PATH, ttl_sec: int = LLM_CACHE_TTL_SEC,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def _incr(self, conn: sqlite3.Connection, name: str):
+        conn.execute(
+            "INSERT INTO counters(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            conn = self._conn()
+            now = time.time()
+            row = conn.execute(
+                "SELECT value FROM entries WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_sec),
+            ).fetchone()
+            if row is None:
+                self._incr(conn, "misses")
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._incr(conn, "hits")
+            return row[0]
+        except sqlite3.Error as e:
+            print("⚠️ LLM cache read failed:", e)
+            return None
+
+    def put(self, key: str, value: str):
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries(key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict(conn, now)
+        except sqlite3.Error as e:
+            print("⚠️ LLM cache write failed:", e)
+
+    def delete(self, key: str):
+        """검증 / dry run에서 거부된 응답: 다음 요청이 같은 결과를 TTL 동안 다시 받지 않게."""
+        try:
+            self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print("⚠️ LLM cache delete failed:", e)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_sec,))
+        conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "entries": entries,
+        }
+
+
+llm_cache = LLMCache()
+
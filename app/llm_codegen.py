@@ -1,25 +1,62 @@
 # app/llm_codegen.py
-import os, json
-from openai import OpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-REFERENCE_PATH = "app/render_cnn_matrix.py"  # 너가 쓴 파일 경로
-with open(REFERENCE_PATH, "r", encoding="utf-8") as f:
-    reference_code = f.read()
+from app.llm_gateway import prompt_json
+from app.model_router import model_router
+from app.code_gate import repair_scene_code, validate_scene_code
+
+
+# app/scenes/cnn_param.py (CNNParamScene) 전체(400줄+)를 매번 보내는 대신, 그 파일에서 쓰는 핵심 idiom만 추린 예시.
+# SYSTEM_PROMPT는 요청마다 바이트 단위로 같아야 provider prefix cache가 맞으므로 동적인 값을 넣지 않는다.
+REFERENCE_IDIOMS = r"""
+from manim import *
+
+class AlgorithmScene(Scene):
+    def construct(self):
+        cell, gap = 0.42, 0.02
+        n, values = 3, [1, 0, 2, 3, 1, 0, 2, 1, 3]
+        patch, k = [0, 1, 3, 4], 1          # 커널이 덮는 셀 / 다음 위치
+
+        # grid: Square를 VGroup으로 묶고 arrange_in_grid, 값은 셀 중앙에 Text
+        grid = VGroup(*[Square(cell, color=GREY, fill_opacity=0.05) for _ in range(n * n)])
+        grid.arrange_in_grid(rows=n, cols=n, buff=gap).move_to(LEFT * 3.5)
+        texts = [Text(str(v), font_size=24).move_to(grid[i].get_center()) for i, v in enumerate(values)]
+        out_grid = VGroup(*[Square(cell, color=BLUE_B) for _ in range(4)])
+        out_grid.arrange_in_grid(rows=2, cols=2, buff=gap).move_to(RIGHT * 3.5)
+        self.add(grid, *texts, out_grid)
+
+        # 라벨은 대상 옆에 next_to로 붙이고 Write
+        label = Text("Input", color=GRAY_B, font_size=28).next_to(grid, DOWN, buff=0.3)
+        self.play(Write(label))
+
+        # 강조: SurroundingRectangle → Create, 끝나면 FadeOut
+        box = SurroundingRectangle(VGroup(*[grid[i] for i in patch]), color=YELLOW)
+        self.play(Create(box))
+
+        # 수식은 MathTex, 부분 색은 set_color_by_tex
+        eq = MathTex("3 \\times 1 + 0 = 3").scale(0.55).next_to(box, RIGHT, buff=0.7)
+        self.play(Write(eq), run_time=0.7)
+
+        # 이동: 기존 객체를 새 위치의 객체로 ReplacementTransform (짧은 run_time)
+        nxt = box.copy().move_to(grid[k])
+        self.play(ReplacementTransform(box, nxt), run_time=0.15)
+        box = nxt
+
+        # 값 갱신: 새 Text를 같은 위치에 FadeIn
+        self.play(FadeIn(MathTex("3").scale(0.45).move_to(out_grid[0].get_center())), run_time=0.05)
+
+        self.play(FadeOut(VGroup(box, eq, label)))
+        self.wait(2)
+"""
 
 SYSTEM_PROMPT = f"""
 You are a Manim code generator.
 You will receive a structured animation IR (entities, layout, actions)
 and must produce a complete, executable Python script using Manim.
 
-Below is a **reference example** of excellent Manim code style
-(from render_cnn_matrix). Follow this level of structure, clarity, and animation pacing.
+Below are the **reference idioms** of our house Manim style
+(condensed from our CNN parameter scene). Follow this level of structure, clarity, and animation pacing.
 
 <reference_example>
-{reference_code}
+{REFERENCE_IDIOMS.strip()}
 </reference_example>
 
 IMPORTANT RULES:
@@ -42,12 +79,9 @@ Style rules you MUST follow:
 9. End with self.wait(2).
 """
 
-def build_prompt_codegen(anim_ir: dict) -> str:
-    return f"""
-You are a Manim expert. Convert the following structured animation IR into a **complete** Manim Scene.
-
-IR:
-{json.dumps(anim_ir, indent=2, ensure_ascii=False)}
+# 요청마다 같은 지시문을 앞에, 바뀌는 IR은 맨 뒤에 둔다 (prefix cache)
+CODEGEN_INSTRUCTIONS = """
+You are a Manim expert. Convert the structured animation IR at the end of this message into a **complete** Manim Scene.
 
 Requirements:
 1. **Must visualize every operation sequentially** — no skipping.
@@ -63,20 +97,32 @@ Output:
 - Write **only Python code** that defines one Manim Scene class (e.g., `class AlgorithmScene(Scene)`).
 - Do not include markdown (no ```python or ```).
 - Code must be directly executable by `manim`.
-"""
+""".strip()
 
+def build_prompt_codegen(anim_ir: dict) -> str:
+    return f"{CODEGEN_INSTRUCTIONS}\n\nIR:\n{prompt_json(anim_ir)}"
 
 
-def call_llm_codegen(anim_ir: dict):
-    prompt = build_prompt_codegen(anim_ir)
-    resp = client.chat.completions.create(
-        model="gpt-5",
-        messages=[
+def _codegen_request(anim_ir: dict) -> dict:
+    return {
+        "stage": "codegen",
+        "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
+            {"role": "user", "content": build_prompt_codegen(anim_ir)},
         ],
-    )
-    code = resp.choices[0].message.content
+    }
+
+def _domain_of(doc: dict):
+    return (doc.get("metadata") or {}).get("domain")
+
+def call_llm_codegen(anim_ir: dict):
+    return model_router.complete(_codegen_request(anim_ir), parse=repair_scene_code,
+                                 validate=validate_scene_code, domain=_domain_of(anim_ir))
+
+async def acall_llm_codegen(anim_ir: dict):
+    return await model_router.acomplete(_codegen_request(anim_ir), parse=repair_scene_code,
+                                        validate=validate_scene_code, domain=_domain_of(anim_ir))
 
-    code = code.replace("```python", "").replace("```", "").strip()
-    return code
+def discard_llm_codegen(anim_ir: dict):
+    """정적 검사 / dry run / 렌더에서 거부된 코드: 같은 IR이 7일 동안 같은 코드를 다시 받지 않게 cache에서 삭제."""
+    model_router.discard(_codegen_request(anim_ir))
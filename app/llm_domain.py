@@ -1,10 +1,12 @@
 # app/llm_domain.py
-import os, json
-from openai import OpenAI
-from dotenv import load_dotenv
-from app.llm import call_llm_domain_ir
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from typing import Optional
+from app.llm import call_llm_domain_ir, acall_llm_domain_ir
+from app.llm_gateway import LLMUnavailableError
+from app.model_router import model_router
+from app.domain_classifier import classify_domain, LOCAL_CLASSIFIER_THRESHOLD
+from app.sorting_trace import local_sorting_trace, example_sorting_trace
+from app.cnn_params import local_cnn_param_ir
+from app.schema import json_schema_format
 
 DOMAIN_SYSTEM_PROMPT = """
 You are a strict domain classifier for algorithm / AI descriptions.
@@ -31,24 +33,153 @@ Classification rules:
 Return ONLY JSON. No extra text, no comments.
 """
 
-def call_llm_detect_domain(user_text: str) -> str:
-    """LLM이 사용자 입력을 보고 도메인만 분류하게 하는 전용 함수."""
+def _local_domain(user_text: str) -> Optional[str]:
+    """로컬 키워드 분류기가 충분히 확신하면 그 domain, 아니면 None."""
+    domain, confidence = classify_domain(user_text)
+    if confidence >= LOCAL_CLASSIFIER_THRESHOLD:
+        print(f"⚡ local domain: {domain} (confidence={confidence})")
+        return domain
+    return None
+
+
+ALLOWED_DOMAINS = {"cnn_param", "sorting", "transformer", "cache", "math", "generic"}
+
+# strict 출력: 허용 목록 밖의 domain은 나올 수 없다
+DOMAIN_LABEL_FORMAT = json_schema_format("domain_label", {
+    "type": "object",
+    "required": ["domain"],
+    "properties": {"domain": {"type": "string", "enum": sorted(ALLOWED_DOMAINS)}},
+})
+
+
+def _validate_domain(data: dict) -> list:
+    domain = data.get("domain") if isinstance(data, dict) else None
+    return [] if domain in ALLOWED_DOMAINS else [f"domain must be one of {sorted(ALLOWED_DOMAINS)}"]
+
+
+def _fallback_domain(user_text: str, error: Exception) -> str:
+    """LLM을 쓸 수 없으면 확신이 낮더라도 로컬 분류기의 1순위를 쓴다."""
+    domain, confidence = classify_domain(user_text)
+    print(f"⚠️ LLM unavailable ({error}), using local domain: {domain} (confidence={confidence})")
+    return domain
+
+
+def _detect_domain_request(user_text: str) -> dict:
     prompt = f'Text:\n"""\n{user_text}\n"""\n\nReturn JSON with the "domain" field only.'
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
+    return {
+        "stage": "detect_domain",
+        "response_format": DOMAIN_LABEL_FORMAT,
+        "messages": [
             {"role": "system", "content": DOMAIN_SYSTEM_PROMPT},
             {"role": "user", "content": prompt},
         ],
-    )
-    data = json.loads(resp.choices[0].message.content)
-    domain = data.get("domain", "generic")
-    return domain
+    }
+
+
+def call_llm_detect_domain(user_text: str) -> str:
+    """
+    사용자 입력의 도메인 분류.
+    로컬 키워드 분류기가 충분히 확신하면 그대로 쓰고, 애매할 때만 LLM에 묻는다.
+    """
+    domain = _local_domain(user_text)
+    if domain is not None:
+        return domain
+    try:
+        data = model_router.complete(_detect_domain_request(user_text), validate=_validate_domain)
+    except LLMUnavailableError as e:
+        return _fallback_domain(user_text, e)
+    return data.get("domain", "generic")
+
+
+async def acall_llm_detect_domain(user_text: str) -> str:
+    domain = _local_domain(user_text)
+    if domain is not None:
+        return domain
+    try:
+        data = await model_router.acomplete(_detect_domain_request(user_text), validate=_validate_domain)
+    except LLMUnavailableError as e:
+        return _fallback_domain(user_text, e)
+    return data.get("domain", "generic")
+
+
+def _local_sorting_trace(user_text: str) -> Optional[dict]:
+    trace = local_sorting_trace(user_text)
+    if trace is not None:
+        print(f"⚡ local sorting trace: {trace['algorithm']} ({len(trace['trace'])} steps)")
+    return trace
+
+
+def _fallback_sorting_trace(user_text: str, error: Exception) -> dict:
+    trace = example_sorting_trace(user_text)
+    if trace is None:
+        raise error
+    print(f"⚠️ LLM unavailable ({error}), using example array: {trace['input']['array']}")
+    trace["metadata"]["degraded"] = True   # semantic cache에 남기지 않는다
+    return trace
+
 
 def build_sorting_trace_ir(user_text: str) -> dict:
     """
-    자연어 정렬 설명에서 sorting_trace IR을 생성하는 thin wrapper.
-    prompts.py의 DOMAIN_PROMPTS["sorting_trace"]를 사용한다.
+    자연어 정렬 설명에서 sorting_trace IR을 생성.
+    배열을 찾고 지원하는 알고리즘이면 로컬 시뮬레이터로 정확한 trace를 만들고,
+    그 밖의 경우(배열이 없거나 shell sort 등 시뮬레이터가 없는 정렬)에만 prompts.py의 DOMAIN_PROMPTS["sorting_trace"]로 LLM에 맡긴다.
+    """
+    trace = _local_sorting_trace(user_text)
+    if trace is not None:
+        return trace
+    try:
+        return call_llm_domain_ir("sorting_trace", user_text)
+    except LLMUnavailableError as e:
+        return _fallback_sorting_trace(user_text, e)
+
+
+async def abuild_sorting_trace_ir(user_text: str) -> dict:
+    trace = _local_sorting_trace(user_text)
+    if trace is not None:
+        return trace
+    try:
+        return await acall_llm_domain_ir("sorting_trace", user_text)
+    except LLMUnavailableError as e:
+        return _fallback_sorting_trace(user_text, e)
+
+
+def _local_cnn_param_ir(user_text: str) -> Optional[dict]:
+    doc = local_cnn_param_ir(user_text)
+    if doc is not None:
+        print(f"⚡ local cnn params: {doc['ir']['params']}")
+    return doc
+
+
+def _fallback_cnn_param_ir(user_text: str, error: Exception) -> dict:
+    """빠진 필수 값만 기본값으로 채운다. 값이 애매하거나 불가능한 조합이면 그대로 실패."""
+    doc = local_cnn_param_ir(user_text, fill_required=True)
+    if doc is None:
+        raise error
+    print(f"⚠️ LLM unavailable ({error}), using default cnn params: {doc['ir']['params']}")
+    doc["ir"]["metadata"]["degraded"] = True
+    return doc
+
+
+def build_cnn_param_ir(user_text: str) -> dict:
+    """
+    자연어 CNN 설명에서 cnn_param IR을 생성.
+    input_size / kernel_size 등을 문장에서 확실히 읽을 수 있으면 로컬 파서 결과를 쓰고,
+    필수 값이 없거나 애매할 때만 DOMAIN_PROMPTS["cnn_param"]로 LLM에 맡긴다.
     """
-    return call_llm_domain_ir("sorting_trace", user_text)
\ No newline at end of file
+    doc = _local_cnn_param_ir(user_text)
+    if doc is not None:
+        return doc
+    try:
+        return call_llm_domain_ir("cnn_param", user_text)
+    except LLMUnavailableError as e:
+        return _fallback_cnn_param_ir(user_text, e)
+
+
+async def abuild_cnn_param_ir(user_text: str) -> dict:
+    doc = _local_cnn_param_ir(user_text)
+    if doc is not None:
+        return doc
+    try:
+        return await acall_llm_domain_ir("cnn_param", user_text)
+    except LLMUnavailableError as e:
+        return _fallback_cnn_param_ir(user_text, e)
@@ -0,0 +1,575 @@
+# app/llm_gateway.py
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI
+
+from app.llm_cache import llm_cache, cache_key, LLM_CACHE_ENABLED
+
+load_dotenv()
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "16"))   # 동시에 열 수 있는 HTTP 연결 (= 동시 호출 상한)
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "8"))
+LLM_HTTP_TIMEOUT_SEC = float(os.getenv("LLM_HTTP_TIMEOUT_SEC", "600"))
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))             # 모델별 분당 요청 수
+LLM_TPM = int(os.getenv("LLM_TPM", "200000"))          # 모델별 분당 토큰 수
+LLM_COMPLETION_RESERVE = int(os.getenv("LLM_COMPLETION_RESERVE", "1024"))  # 응답 토큰 예약분 (호출 후 실제 값으로 정산)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_TELEMETRY_SIZE = int(os.getenv("LLM_TELEMETRY_SIZE", "500"))
+
+# stage별 전체 deadline (재시도 포함). LLM_DEADLINE_<STAGE> 로 개별 조정
+STAGE_DEADLINES_SEC = {
+    "detect_domain": 20.0,
+    "pseudocode": 60.0,
+    "anim_ir": 60.0,
+    "stage1": 120.0,
+    "domain_ir": 120.0,
+    "codegen": 240.0,
+}
+LLM_DEFAULT_DEADLINE_SEC = float(os.getenv("LLM_DEFAULT_DEADLINE_SEC", "120"))
+
+# stage별 프롬프트 토큰 예산 (추정치 기준, 넘으면 경고만). LLM_PROMPT_BUDGET_<STAGE> 로 개별 조정
+STAGE_PROMPT_BUDGETS = {
+    "detect_domain": 600,
+    "pseudocode": 1500,
+    "anim_ir": 2500,
+    "stage1": 800,
+    "domain_ir": 1500,
+    "codegen": 3500,
+}
+
+# hedging: 응답이 (model, stage) 최근 latency의 p95보다 늦으면 같은 요청을 하나 더 보내 먼저 온 것을 쓴다
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "1") != "0"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "8"))
+LLM_HEDGE_DELAY_SEC = float(os.getenv("LLM_HEDGE_DELAY_SEC", "30"))   # 표본이 부족할 때 쓰는 지연
+
+# circuit breaker: 연속 실패(timeout / 연결 오류 / 5xx)가 쌓이면 cooldown 동안 바로 실패
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_SEC = float(os.getenv("LLM_BREAKER_COOLDOWN_SEC", "30"))
+
+AIMD_INCREASE = 0.05    # 성공할 때마다 속도 배율 +0.05
+AIMD_DECREASE = 0.5     # 429를 받으면 속도 배율 x0.5
+AIMD_MIN_SCALE = 0.05
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+PROVIDER_ERRORS = (openai.APIConnectionError, openai.InternalServerError)   # breaker가 세는 오류 (timeout 포함)
+
+
+class LLMUnavailableError(RuntimeError):
+    """
+    provider가 응답할 수 없는 상태 (circuit open, deadline 초과, 재시도 소진).
+    로컬 추출기가 있는 호출부는 이 예외를 잡아 LLM 없이 진행한다.
+    """
+
+
+def stage_deadline(stage: str) -> float:
+    base = stage.split(":", 1)[0]   # "domain_ir:cnn_param" → "domain_ir"
+    default = STAGE_DEADLINES_SEC.get(base, LLM_DEFAULT_DEADLINE_SEC)
+    return float(os.getenv(f"LLM_DEADLINE_{base.upper()}", default))
+
+
+def prompt_budget(stage: str) -> Optional[int]:
+    base = stage.split(":", 1)[0]
+    default = STAGE_PROMPT_BUDGETS.get(base)
+    value = os.getenv(f"LLM_PROMPT_BUDGET_{base.upper()}", default)
+    return int(value) if value is not None else None
+
+
+def prompt_json(doc: Any) -> str:
+    """프롬프트에 넣는 JSON: 같은 내용이면 같은 바이트 (key 정렬, 공백 없음) → cache/prefix cache가 맞는다."""
+    return json.dumps(doc, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """tokenizer 없이 대략 추정 (UTF-8 4바이트 ≈ 1토큰, 한국어는 조금 과대평가)."""
+    size = sum(len(str(m.get("content", "")).encode("utf-8")) for m in messages)
+    return size // 4 + 4 * len(messages)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(max(1, per_minute))
+        self.rate = self.capacity / 60.0   # 초당 보충량
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float, scale: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate * scale)
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    모델 하나의 RPM/TPM token bucket.
+    - 호출 전에 요청 1개 + 예상 토큰을 차감, 호출 후 실제 사용량으로 정산
+    - AIMD: 429를 받으면 보충 속도를 절반으로, 성공할 때마다 조금씩 원래 속도로 복구
+    - sync(thread)와 async(event loop) 호출자가 같은 bucket을 공유한다
+    """
+
+    def __init__(self, rpm: int = LLM_RPM, tpm: int = LLM_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.scale = 1.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """지금 차감할 수 있으면 차감하고 0, 아니면 기다려야 할 초를 반환."""
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now, self.scale)
+            self.tokens.refill(now, self.scale)
+            tokens = min(tokens, self.tokens.capacity)  # bucket보다 큰 요청이 영원히 기다리지 않게
+            need_req = 1 - self.requests.level
+            need_tok = tokens - self.tokens.level
+            if need_req <= 0 and need_tok <= 0:
+                self.requests.level -= 1
+                self.tokens.level -= tokens
+                return 0.0
+            return max(need_req / self.requests.rate, need_tok / self.tokens.rate) / self.scale
+
+    def acquire(self, tokens: int):
+        while (wait := self._reserve(tokens)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int):
+        while (wait := self._reserve(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, reserved: int, used: int):
+        with self._lock:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + reserved - used)
+
+    def on_success(self):
+        with self._lock:
+            self.scale = min(1.0, self.scale + AIMD_INCREASE)
+
+    def on_rate_limited(self):
+        with self._lock:
+            self.scale = max(AIMD_MIN_SCALE, self.scale * AIMD_DECREASE)
+            self.requests.level = min(self.requests.level, 0.0)
+
+
+class CircuitBreaker:
+    """
+    모델 하나의 circuit breaker (closed → open → half_open → closed).
+    - closed: 정상. provider 오류가 연속 failures번 나면 open
+    - open: cooldown 동안 호출하지 않고 바로 LLMUnavailableError
+    - half_open: cooldown 후 probe 한 건만 통과시켜서 성공하면 closed, 실패하면 다시 open
+    """
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, cooldown_sec: float = LLM_BREAKER_COOLDOWN_SEC):
+        self.threshold = max(1, failures)
+        self.cooldown_sec = cooldown_sec
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def check(self, model: str):
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.cooldown_sec:
+                    raise LLMUnavailableError(f"circuit open for {model}")
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probing:
+                    raise LLMUnavailableError(f"circuit half-open for {model}, probe in flight")
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    print(f"🔌 circuit opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def record_neutral(self):
+        """provider 상태와 무관한 결과 (4xx, 429, 취소) → probe 자리만 반납."""
+        with self._lock:
+            self._probing = False
+
+
+class _Call:
+    """complete()/acomplete() 한 번의 상태 (재시도/hedge 시도들이 공유)."""
+
+    def __init__(self, gateway: "LLMGateway", model: str, stage: str,
+                 messages: List[Dict[str, Any]], kwargs: Dict[str, Any]):
+        self.model = model
+        self.stage = stage
+        self.kwargs = kwargs
+        self.limiter = gateway.limiter(model)
+        self.breaker = gateway.breaker(model)
+        self.prompt_estimate = estimate_tokens(messages)
+        self.reserved = self.prompt_estimate + LLM_COMPLETION_RESERVE
+        budget = prompt_budget(stage)
+        if budget is not None and self.prompt_estimate > budget:
+            print(f"⚠️ {stage} prompt ~{self.prompt_estimate} tokens exceeds budget {budget}")
+        self.deadline = time.monotonic() + stage_deadline(stage)
+
+    def remaining(self) -> float:
+        """남은 시간(초). 다 썼으면 LLMUnavailableError."""
+        left = self.deadline - time.monotonic()
+        if left <= 0:
+            raise LLMUnavailableError(f"{self.model} {self.stage} deadline exceeded")
+        return left
+
+
+class LLMGateway:
+    """
+    모든 call_llm_* 가 거치는 단일 출구.
+    - keep-alive HTTP 연결 pool 하나 (sync / async client 각각 하나씩, lazy 생성)
+    - LLM cache → circuit breaker → rate limiter → chat.completions 순서로 처리
+    - stage별 deadline 안에서만 재시도, async 호출은 p95보다 늦으면 hedge 요청
+    - 호출마다 model / stage / 토큰 수 / latency 를 기록 (GET /stats)
+    """
+
+    def __init__(self):
+        self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=LLM_TELEMETRY_SIZE)
+        self._totals: Dict[str, Dict[str, Any]] = {}
+        self._stage_totals: Dict[str, Dict[str, Any]] = {}
+
+    # ---------- client / limiter / breaker ----------
+    @staticmethod
+    def _http_options() -> Dict[str, Any]:
+        return {
+            "limits": httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                                   max_keepalive_connections=LLM_MAX_KEEPALIVE),
+            # pool=None: 연결이 모두 사용 중이면 빈 연결이 생길 때까지 기다린다 (동시 호출 상한)
+            "timeout": httpx.Timeout(LLM_HTTP_TIMEOUT_SEC, connect=10.0, pool=None),
+        }
+
+    @property
+    def client(self) -> OpenAI:
+        with self._lock:
+            if self._client is None:
+                self._client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=openai.DefaultHttpxClient(**self._http_options()),
+                    max_retries=0,   # 재시도는 gateway가 직접 (429를 limiter에 반영하기 위해)
+                )
+            return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """app.async_runtime loop 에서만 사용 (연결 pool이 처음 쓴 loop에 묶인다)."""
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = AsyncOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=openai.DefaultAsyncHttpxClient(**self._http_options()),
+                    max_retries=0,
+                )
+            return self._async_client
+
+    def limiter(self, model: str) -> RateLimiter:
+        with self._lock:
+            if model not in self._limiters:
+                self._limiters[model] = RateLimiter()
+            return self._limiters[model]
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker()
+            return self._breakers[model]
+
+    def is_available(self, model: str) -> bool:
+        """circuit이 열려 있지 않은지 (열려 있으면 호출부가 LLM 단계를 건너뛸 수 있다)."""
+        b = self.breaker(model)
+        return b.state != "open" or time.monotonic() - b.opened_at >= b.cooldown_sec
+
+    # ---------- 호출 ----------
+    @staticmethod
+    def _request_kwargs(model: str, messages: List[Dict[str, Any]],
+                        response_format: Optional[Dict[str, Any]],
+                        temperature: Optional[float]) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"model": model, "messages": messages}
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        return kwargs
+
+    def complete(self, *, model: str, messages: List[Dict[str, Any]],
+                 response_format: Optional[Dict[str, Any]] = None,
+                 temperature: Optional[float] = None, stage: str = "") -> str:
+        """
+        chat.completions 호출 후 message content 문자열을 반환.
+        같은 (model, messages, response_format, temperature)면 cache에서 바로 반환.
+        provider 장애/deadline 초과는 LLMUnavailableError.
+        """
+        return self.fetch(model=model, messages=messages, response_format=response_format,
+                          temperature=temperature, stage=stage)[0]
+
+    async def acomplete(self, *, model: str, messages: List[Dict[str, Any]],
+                        response_format: Optional[Dict[str, Any]] = None,
+                        temperature: Optional[float] = None, stage: str = "") -> str:
+        """complete 의 async 버전 (+ hedging). SQLite 접근은 thread로 넘긴다."""
+        return (await self.afetch(model=model, messages=messages, response_format=response_format,
+                                  temperature=temperature, stage=stage))[0]
+
+    def discard(self, *, model: str, messages: List[Dict[str, Any]],
+                response_format: Optional[Dict[str, Any]] = None,
+                temperature: Optional[float] = None, stage: str = ""):
+        """이 요청의 cache 항목 삭제 (출력이 검증 / dry run에서 거부됐을 때)."""
+        if LLM_CACHE_ENABLED:
+            llm_cache.delete(cache_key(model, messages, response_format, temperature))
+
+    def fetch(self, *, model: str, messages: List[Dict[str, Any]],
+              response_format: Optional[Dict[str, Any]] = None,
+              temperature: Optional[float] = None, stage: str = "") -> Tuple[str, bool]:
+        """(content, cache에서 왔는지). model_router가 새 응답만 통계에 넣을 수 있게."""
+        key = cache_key(model, messages, response_format, temperature)
+        if LLM_CACHE_ENABLED:
+            hit = llm_cache.get(key)
+            if hit is not None:
+                self._count(model, "cache_hits")
+                return hit, True
+
+        call = _Call(self, model, stage, messages,
+                     self._request_kwargs(model, messages, response_format, temperature))
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                content = self._create_once(call, attempt)
+            except RETRYABLE_ERRORS as e:
+                time.sleep(self._retry_delay(call, e, attempt))
+                continue
+            if LLM_CACHE_ENABLED:
+                llm_cache.put(key, content)
+            return content, False
+
+    async def afetch(self, *, model: str, messages: List[Dict[str, Any]],
+                     response_format: Optional[Dict[str, Any]] = None,
+                     temperature: Optional[float] = None, stage: str = "") -> Tuple[str, bool]:
+        key = cache_key(model, messages, response_format, temperature)
+        if LLM_CACHE_ENABLED:
+            hit = await asyncio.to_thread(llm_cache.get, key)
+            if hit is not None:
+                self._count(model, "cache_hits")
+                return hit, True
+
+        call = _Call(self, model, stage, messages,
+                     self._request_kwargs(model, messages, response_format, temperature))
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                content = await self._acreate_hedged(call, attempt)
+            except RETRYABLE_ERRORS as e:
+                await asyncio.sleep(self._retry_delay(call, e, attempt))
+                continue
+            if LLM_CACHE_ENABLED:
+                await asyncio.to_thread(llm_cache.put, key, content)
+            return content, False
+
+    def _create_once(self, call: _Call, attempt: int) -> str:
+        call.breaker.check(call.model)
+        call.limiter.acquire(call.reserved)
+        started = time.perf_counter()
+        try:
+            resp = self.client.chat.completions.create(**call.kwargs, timeout=call.remaining())
+        except BaseException as e:
+            self._on_failure(call, e, started, attempt)
+            raise
+        return self._on_success(call, resp, started, attempt)
+
+    async def _acreate_once(self, call: _Call, attempt: int, hedge: bool = False) -> str:
+        call.breaker.check(call.model)
+        await call.limiter.aacquire(call.reserved)
+        started = time.perf_counter()
+        try:
+            resp = await self.async_client.chat.completions.create(**call.kwargs, timeout=call.remaining())
+        except BaseException as e:
+            self._on_failure(call, e, started, attempt)
+            raise
+        if hedge:
+            self._count(call.model, "hedge_wins")
+        return self._on_success(call, resp, started, attempt)
+
+    async def _acreate_hedged(self, call: _Call, attempt: int) -> str:
+        """
+        첫 요청이 hedge 지연 안에 끝나지 않으면 같은 요청을 하나 더 보내고 먼저 성공한 쪽을 쓴다.
+        진 쪽은 취소. 둘 다 실패하면 먼저 보낸 요청의 예외를 올린다.
+        """
+        primary = asyncio.ensure_future(self._acreate_once(call, attempt))
+        delay = self._hedge_delay(call.model, call.stage)
+        if delay is None or delay >= call.deadline - time.monotonic():
+            return await primary
+
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            print(f"🪞 hedging {call.model} {call.stage} after {delay:.1f}s")
+            self._count(call.model, "hedged")
+            pending.add(asyncio.ensure_future(self._acreate_once(call, attempt, hedge=True)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return primary.result()   # 둘 다 실패 → primary 예외
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self, model: str, stage: str) -> Optional[float]:
+        if not LLM_HEDGE_ENABLED:
+            return None
+        with self._lock:
+            latencies = sorted(r["latency_ms"] for r in self._records
+                               if r["model"] == model and r["stage"] == stage and r["status"] == "ok")
+        if len(latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DELAY_SEC
+        return latencies[int(LLM_HEDGE_PERCENTILE * (len(latencies) - 1))] / 1000.0
+
+    def _on_success(self, call: _Call, resp, started: float, attempt: int) -> str:
+        usage = getattr(resp, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        # provider prefix cache에 맞은 프롬프트 토큰 수
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+        call.limiter.settle(call.reserved, prompt_tokens + completion_tokens)
+        call.limiter.on_success()
+        call.breaker.record_success()
+        self._record(call, started, "ok", attempt, prompt_tokens, completion_tokens, cached_tokens)
+        return resp.choices[0].message.content
+
+    def _on_failure(self, call: _Call, e: BaseException, started: float, attempt: int):
+        call.limiter.settle(call.reserved, 0)
+        if isinstance(e, asyncio.CancelledError):
+            call.breaker.record_neutral()
+            self._record(call, started, "cancelled", attempt)
+        elif isinstance(e, openai.RateLimitError):
+            call.breaker.record_neutral()
+            call.limiter.on_rate_limited()
+            self._record(call, started, "rate_limited", attempt)
+        elif isinstance(e, PROVIDER_ERRORS):
+            call.breaker.record_failure()
+            status = "timeout" if isinstance(e, openai.APITimeoutError) else "error"
+            self._record(call, started, status, attempt)
+        else:
+            call.breaker.record_neutral()
+            self._record(call, started, "error", attempt)
+
+    def _retry_delay(self, call: _Call, e: Exception, attempt: int) -> float:
+        """재시도 전 대기 시간. 재시도 횟수나 deadline을 다 썼으면 LLMUnavailableError."""
+        if attempt >= LLM_MAX_RETRIES:
+            raise LLMUnavailableError(f"{call.model} {call.stage} failed after {attempt + 1} attempts: {e}") from e
+        delay = 2.0 ** attempt
+        retry_after = getattr(getattr(e, "response", None), "headers", {}).get("retry-after")
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        if delay >= call.remaining():
+            raise LLMUnavailableError(f"{call.model} {call.stage} deadline exceeded: {e}") from e
+        print(f"⏳ LLM {call.model} {call.stage} {type(e).__name__}, retry in {delay:.1f}s")
+        return delay
+
+    # ---------- telemetry ----------
+    def _totals_for(self, model: str) -> Dict[str, Any]:
+        return self._totals.setdefault(model, {
+            "calls": 0, "cache_hits": 0, "errors": 0, "timeouts": 0, "rate_limited": 0,
+            "cancelled": 0, "hedged": 0, "hedge_wins": 0,
+            "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0,
+        })
+
+    def _stage_totals_for(self, stage: str) -> Dict[str, Any]:
+        return self._stage_totals.setdefault(stage.split(":", 1)[0] or "-", {
+            "calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+            "max_prompt_tokens": 0,
+        })
+
+    def _count(self, model: str, name: str):
+        with self._lock:
+            self._totals_for(model)[name] += 1
+
+    def _record(self, call: _Call, started: float, status: str, attempt: int,
+                prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0):
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        record = {
+            "ts": time.time(),
+            "model": call.model,
+            "stage": call.stage,
+            "status": status,
+            "attempt": attempt,
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_ms": latency_ms,
+        }
+        totals_key = {"ok": "calls", "rate_limited": "rate_limited", "timeout": "timeouts",
+                      "cancelled": "cancelled"}.get(status, "errors")
+        with self._lock:
+            self._records.append(record)
+            totals = self._totals_for(call.model)
+            totals[totals_key] += 1
+            if status == "ok":
+                totals["prompt_tokens"] += prompt_tokens
+                totals["cached_tokens"] += cached_tokens
+                totals["completion_tokens"] += completion_tokens
+                totals["latency_ms"] += latency_ms
+                stage_totals = self._stage_totals_for(call.stage)
+                stage_totals["calls"] += 1
+                stage_totals["prompt_tokens"] += prompt_tokens
+                stage_totals["cached_tokens"] += cached_tokens
+                stage_totals["completion_tokens"] += completion_tokens
+                stage_totals["max_prompt_tokens"] = max(stage_totals["max_prompt_tokens"], prompt_tokens)
+        print(f"📡 {call.model} {call.stage or '-'} {status} {latency_ms}ms "
+              f"(in={prompt_tokens}, cached={cached_tokens}, out={completion_tokens})")
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._records)[-limit:]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {}
+            for model, totals in self._totals.items():
+                latencies = sorted(r["latency_ms"] for r in self._records
+                                   if r["model"] == model and r["status"] == "ok")
+                breaker = self._breakers.get(model)
+                models[model] = {
+                    **{k: v for k, v in totals.items() if k != "latency_ms"},
+                    "avg_latency_ms": round(totals["latency_ms"] / totals["calls"], 1) if totals["calls"] else None,
+                    "p95_latency_ms": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+                    "rate_scale": round(self._limiters[model].scale, 3) if model in self._limiters else 1.0,
+                    "circuit": breaker.state if breaker else "closed",
+                }
+            stages = {
+                stage: {
+                    **totals,
+                    "avg_prompt_tokens": round(totals["prompt_tokens"] / totals["calls"]) if totals["calls"] else None,
+                    "prompt_budget": prompt_budget(stage),
+                }
+                for stage, totals in self._stage_totals.items()
+            }
+            return {"models": models, "stages": stages}
+
+
+llm_gateway = LLMGateway()
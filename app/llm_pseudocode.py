@@ -1,11 +1,9 @@
 # app/llm_pseudocode.py
-import os, json
-from openai import OpenAI
-from dotenv import load_dotenv
-from app.llm_domain import call_llm_detect_domain
+import asyncio
+from app.llm_domain import call_llm_detect_domain, acall_llm_detect_domain
+from app.model_router import model_router
+from app.schema import validate_pseudocode_ir
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 SYSTEM_PROMPT_PSEUDOCODE = """
 You are an algorithm reasoning engine.
@@ -74,25 +72,41 @@ Text to convert:
 Output JSON strictly matching the schema described above.
 """.strip()
 
-def call_llm_pseudocode_ir(user_text: str):
-    domain = call_llm_detect_domain(user_text)
-
-    prompt = build_prompt_pseudocode(user_text)
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
+def _pseudocode_request(user_text: str) -> dict:
+    return {
+        "stage": "pseudocode",
+        "response_format": {"type": "json_object"},
+        "messages": [
             {"role": "system", "content": SYSTEM_PROMPT_PSEUDOCODE},
-            {"role": "user", "content": prompt},
+            {"role": "user", "content": build_prompt_pseudocode(user_text)},
         ],
-    )
-    result = json.loads(resp.choices[0].message.content)
-
-    meta = result.setdefault("metadata", {})
-    meta["domain"] = domain
+    }
 
+def attach_domain(pseudo_ir: dict, domain: str) -> dict:
+    # pseudocode 프롬프트는 domain을 쓰지 않으므로 호출자가 나중에 붙인다
+    result = dict(pseudo_ir)
+    result["metadata"] = {**(result.get("metadata") or {}), "domain": domain}
     return result
 
-
-
-
+def call_llm_pseudocode_ir(user_text: str, domain: str | None = None):
+    # domain을 이미 알고 있으면 (stage graph) 분류를 다시 하지 않는다
+    if domain is None:
+        domain = call_llm_detect_domain(user_text)
+
+    pseudo_ir = model_router.complete(_pseudocode_request(user_text), validate=validate_pseudocode_ir)
+    return attach_domain(pseudo_ir, domain)
+
+async def acall_llm_pseudocode(user_text: str) -> dict:
+    """domain이 붙지 않은 pseudocode JSON (domain 분류와 동시에 돌릴 수 있다)."""
+    return await model_router.acomplete(_pseudocode_request(user_text), validate=validate_pseudocode_ir)
+
+async def acall_llm_pseudocode_ir(user_text: str, domain: str | None = None):
+    # pseudocode 생성은 domain에 의존하지 않으므로 분류와 동시에 실행
+    if domain is None:
+        pseudo_ir, domain = await asyncio.gather(
+            acall_llm_pseudocode(user_text),
+            acall_llm_detect_domain(user_text),
+        )
+    else:
+        pseudo_ir = await acall_llm_pseudocode(user_text)
+    return attach_domain(pseudo_ir, domain)
@@ -1,111 +1,75 @@
 # app/main.py
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
-from app.llm_pseudocode import call_llm_pseudocode_ir
-from app.llm_anim_ir import call_llm_anim_ir
-from app.llm_codegen import call_llm_codegen
-from app.llm import call_llm_domain_ir, call_llm_attention_ir
-from app.llm_domain import call_llm_detect_domain, build_sorting_trace_ir
+from app.jobs import JobQueue, QueueFullError
+from app.llm_cache import llm_cache
+from app.llm_gateway import llm_gateway
+from app.model_router import model_router
+from app.pipeline import run_generation
+from app.scene_store import scene_store
+from app.render_pool import warm_up_render_pool, shutdown_render_pool
+from app.async_runtime import shutdown_loop
 
 
-from app.render_cnn_matrix import render_cnn_matrix
-from app.render_sorting import render_sorting
-from app.render_seq_attention import render_seq_attention
+class GenerateRequest(BaseModel):
+    text: str
 
-from app.schema import validate_attention_ir
-from app.patterns import PatternType, infer_pattern_type
 
-import tempfile, subprocess
+# LLM 호출 + manim 렌더는 모두 blocking → event loop 밖의 bounded executor에서 실행
+job_queue = JobQueue()
 
 
-class GenerateRequest(BaseModel):
-    text: str
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # manim import / 폰트 초기화를 첫 요청 전에 끝내 둔다
+    warm_up_render_pool()
+    yield
+    job_queue.shutdown(wait=False)
+    shutdown_loop()
+    shutdown_render_pool()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
-@app.post("/generate")
+@app.post("/generate", status_code=202)
 async def generate_visualization(req: GenerateRequest):
-    user_text = req.text
-
-    # 1️⃣ 자연어 → pseudocode IR (여기서 domain을 뽑는다)
-    pseudo_ir = call_llm_pseudocode_ir(user_text)
-    meta = pseudo_ir.get("metadata") or {}
-    domain = meta.get("domain", "generic")
+    """요청을 job으로 등록하고 job id를 바로 돌려준다. 결과는 GET /jobs/{id} 로 조회."""
+    try:
+        job_id = job_queue.submit(run_generation, req.text)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="render queue is full, try again later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
-    # 2️⃣ domain + IR → pattern_type 추론
-    pattern_type = pseudo_ir.get("pattern_type") or infer_pattern_type(domain, pseudo_ir)
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+    }
 
-    # 3️⃣ 패턴 타입 기준 라우팅
 
-    # --- (A) GRID: CNN / 행렬 계열 ---
-    if pattern_type == PatternType.GRID:
-        # CNN 같은 경우 도메인 전용 IR 한 번 더 뽑는다
-        cnn_ir = call_llm_domain_ir("cnn_param", user_text)
-        cfg = cnn_ir.get("ir", {}).get("params", {})
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """job 상태(queued/running/succeeded/failed)와 완료 시 result를 반환."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job not found: {job_id}")
+    return job
 
-        video_path = render_cnn_matrix(
-            cfg,
-            out_basename=cnn_ir.get("basename", "cnn_param_demo"),
-            fmt=cnn_ir.get("out_format", "mp4"),
-        )
-        return {
-            "domain": domain,
-            "pattern_type": pattern_type.value,
-            "cnn_ir": cnn_ir,
-            "video_path": video_path,
-        }
-
-    # --- (B) SEQUENCE: 정렬, step-by-step ---
-    if pattern_type == PatternType.SEQUENCE:
-        sort_trace = build_sorting_trace_ir(user_text)
-        video_path = render_sorting(sort_trace)
-        return {"video_path": video_path}
-
-    # --- (C) SEQ_ATTENTION: self-attention 시각화 ---
-    if pattern_type == PatternType.SEQ_ATTENTION:
-        attn_ir = call_llm_attention_ir(user_text)
-        errors = validate_attention_ir(attn_ir)
-        if errors:
-            return {
-                "domain": domain,
-                "pattern_type": pattern_type.value,
-                "errors": errors,
-            }
-
-        video_path = render_seq_attention(attn_ir, out_basename="attn_demo")
-        return {
-            "domain": domain,
-            "pattern_type": pattern_type.value,
-            "attention_ir": attn_ir,
-            "video_path": video_path,
-        }
-
-    # --- (D) FLOW: 나중에 파이프라인 애니메이션용 ---
-    if pattern_type == PatternType.FLOW:
-        return {
-            "domain": domain,
-            "pattern_type": pattern_type.value,
-            "message": "flow pattern not implemented yet",
-        }
-
-    # --- (E) fallback: 기존 generic anim_ir → codegen ---
-    anim_ir = call_llm_anim_ir(pseudo_ir)
-    manim_code = call_llm_codegen(anim_ir)
-
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp:
-        tmp.write(manim_code)
-        tmp_path = tmp.name
-
-    subprocess.run(["manim", "-ql", tmp_path, "AlgorithmScene", "--format", "mp4"])
 
+@app.get("/stats")
+async def get_stats():
+    """cache hit/miss, 모델별 토큰/latency 등 운영 지표."""
     return {
-        "domain": domain,
-        "pattern_type": None,
-        "pseudocode_ir": pseudo_ir,
-        "anim_ir": anim_ir,
-        "message": "🎬 fallback generic visualization started",
+        "llm_cache": llm_cache.stats(),
+        "llm_gateway": llm_gateway.stats(),
+        "llm_recent_calls": llm_gateway.recent(),
+        "model_router": model_router.snapshot(),
+        "scene_store": scene_store.stats(),
     }
@@ -0,0 +1,204 @@
+# app/model_router.py
+import os
+import json
+import random
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app.llm_gateway import llm_gateway, estimate_tokens
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4.1-mini")
+LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "gpt-5")
+TIERS = [FAST_MODEL, LARGE_MODEL]      # 싼 것부터
+
+ROUTER_STATS_PATH = Path(os.getenv("ROUTER_STATS_PATH", "cache/model_router.sqlite3"))
+ROUTER_LONG_PROMPT_TOKENS = int(os.getenv("ROUTER_LONG_PROMPT_TOKENS", "6000"))  # 이보다 긴 프롬프트는 바로 large
+ROUTER_MIN_SUCCESS_RATE = float(os.getenv("ROUTER_MIN_SUCCESS_RATE", "0.5"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+ROUTER_EXPLORE_RATE = float(os.getenv("ROUTER_EXPLORE_RATE", "0.05"))  # 성공률이 낮은 tier도 가끔 다시 시도
+ROUTER_DECAY_AT = 200   # (성공+실패)가 이 수를 넘으면 절반으로 줄여 최근 결과 비중을 높인다
+
+# stage별 시작 tier (기본 0 = fast). codegen 검증기(code_gate)는 실행 가능성만 보고 품질은 못 보므로 large에서 시작
+STAGE_BASE_TIER = {"codegen": 1}
+
+# temperature 인자를 받지 않는 reasoning 모델 (escalation 시 temperature를 뺀다)
+FIXED_TEMPERATURE_MODELS = ("gpt-5", "o1", "o3", "o4")
+
+Validator = Callable[[Any], List[str]]
+
+
+class RouterStats:
+    """(stage key, model)별 검증 성공/실패 횟수. SQLite에 저장해서 재시작/worker 간 공유."""
+
+    def __init__(self, path: Path = ROUTER_STATS_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outcomes ("
+                " key TEXT NOT NULL, model TEXT NOT NULL,"
+                " successes REAL NOT NULL DEFAULT 0, failures REAL NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (key, model))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def success_rate(self, key: str, model: str) -> Optional[float]:
+        """표본이 ROUTER_MIN_SAMPLES 미만이면 None."""
+        try:
+            row = self._conn().execute(
+                "SELECT successes, failures FROM outcomes WHERE key = ? AND model = ?", (key, model)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print("⚠️ router stats read failed:", e)
+            return None
+        if row is None or row[0] + row[1] < ROUTER_MIN_SAMPLES:
+            return None
+        return row[0] / (row[0] + row[1])
+
+    def record(self, key: str, model: str, ok: bool):
+        column = "successes" if ok else "failures"
+        try:
+            conn = self._conn()
+            conn.execute(
+                f"INSERT INTO outcomes(key, model, {column}) VALUES (?, ?, 1) "
+                f"ON CONFLICT(key, model) DO UPDATE SET {column} = {column} + 1",
+                (key, model),
+            )
+            conn.execute(
+                "UPDATE outcomes SET successes = successes / 2, failures = failures / 2 "
+                "WHERE key = ? AND model = ? AND successes + failures > ?",
+                (key, model, ROUTER_DECAY_AT),
+            )
+        except sqlite3.Error as e:
+            print("⚠️ router stats write failed:", e)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        out: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for key, model, s, f in self._conn().execute(
+            "SELECT key, model, successes, failures FROM outcomes ORDER BY key, model"
+        ):
+            out.setdefault(key, {})[model] = {
+                "successes": s,
+                "failures": f,
+                "success_rate": round(s / (s + f), 3) if s + f else None,
+            }
+        return out
+
+
+class ModelRouter:
+    """
+    stage / 요청 복잡도 / 과거 검증 성공률로 모델을 고르고,
+    출력이 JSON 파싱이나 검증기(schema_errors, validate_attention_ir, ...)를 통과하지 못하면
+    다음(큰) tier로 한 번 더 요청한다.
+    - 기본은 fast tier에서 시작
+    - 프롬프트가 길거나, 이 stage에서 fast tier 성공률이 낮으면 처음부터 large
+    """
+
+    def __init__(self, stats: Optional[RouterStats] = None):
+        self.stats = stats or RouterStats()
+
+    @staticmethod
+    def _key(stage: str, domain: Optional[str]) -> str:
+        return f"{stage}|{domain}" if domain else stage
+
+    def plan(self, stage: str, messages: List[Dict[str, Any]], domain: Optional[str] = None) -> List[str]:
+        """시도할 모델 순서."""
+        key = self._key(stage, domain)
+        start = STAGE_BASE_TIER.get(stage.split(":", 1)[0], 0)
+        if estimate_tokens(messages) > ROUTER_LONG_PROMPT_TOKENS:
+            start = len(TIERS) - 1
+        while start < len(TIERS) - 1:
+            rate = self.stats.success_rate(key, TIERS[start])
+            if rate is None or rate >= ROUTER_MIN_SUCCESS_RATE or random.random() < ROUTER_EXPLORE_RATE:
+                break
+            start += 1
+        return TIERS[start:]
+
+    @staticmethod
+    def _request_for(request: Dict[str, Any], model: str) -> Dict[str, Any]:
+        req = dict(request, model=model)
+        if model.startswith(FIXED_TEMPERATURE_MODELS):
+            req.pop("temperature", None)
+        return req
+
+    def _check(self, key: str, req: Dict[str, Any], content: str, cached: bool,
+               parse: Callable[[str], Any], validate: Optional[Validator], last: bool):
+        """
+        (결과, 오류 목록). 마지막 tier에서 파싱이 안 되면 그대로 raise.
+        - 통계는 새로 받은 응답만 (cache replay가 tier 선택을 왜곡하지 않게)
+        - 거부된 출력은 LLM cache에서 지운다 (TTL 동안 같은 실패를 다시 받지 않게)
+        """
+        try:
+            result = parse(content)
+        except ValueError as e:
+            result, errors = None, [f"invalid output: {e}"]
+            if last:
+                self._outcome(key, req, cached, errors)
+                raise
+        else:
+            try:
+                errors = validate(result) if validate else []
+            except Exception as e:   # 검증기가 예상 못 한 모양에서 터져도 실패로 취급
+                errors = [f"validator error: {e}"]
+        self._outcome(key, req, cached, errors)
+        return result, errors
+
+    def _outcome(self, key: str, req: Dict[str, Any], cached: bool, errors: List[str]):
+        if not cached:
+            self.stats.record(key, req["model"], not errors)
+        if errors:
+            llm_gateway.discard(**req)
+
+    def discard(self, request: Dict[str, Any]):
+        """
+        호출부의 나중 검사(codegen dry run 등)에서 거부된 출력: 모든 tier의 cache 항목을 지운다.
+        어느 tier가 답했는지는 호출부가 모르므로 전부.
+        """
+        for model in TIERS:
+            llm_gateway.discard(**self._request_for(request, model))
+
+    def complete(self, request: Dict[str, Any], parse: Callable[[str], Any] = json.loads,
+                 validate: Optional[Validator] = None, domain: Optional[str] = None) -> Any:
+        """
+        request: model을 뺀 llm_gateway.complete 인자 (stage, messages, response_format, temperature).
+        검증을 통과한 첫 결과를 반환. 모든 tier가 실패하면 마지막 결과를 그대로 반환 (호출부 검증에 맡김).
+        """
+        stage = request.get("stage", "")
+        key = self._key(stage, domain)
+        models = self.plan(stage, request["messages"], domain)
+        for i, model in enumerate(models):
+            req = self._request_for(request, model)
+            content, cached = llm_gateway.fetch(**req)
+            result, errors = self._check(key, req, content, cached, parse, validate, i == len(models) - 1)
+            if not errors or i == len(models) - 1:
+                return result
+            print(f"⬆️ {stage}: {model} output rejected ({errors[:3]}), escalating")
+
+    async def acomplete(self, request: Dict[str, Any], parse: Callable[[str], Any] = json.loads,
+                        validate: Optional[Validator] = None, domain: Optional[str] = None) -> Any:
+        stage = request.get("stage", "")
+        key = self._key(stage, domain)
+        models = self.plan(stage, request["messages"], domain)
+        for i, model in enumerate(models):
+            req = self._request_for(request, model)
+            content, cached = await llm_gateway.afetch(**req)
+            result, errors = self._check(key, req, content, cached, parse, validate, i == len(models) - 1)
+            if not errors or i == len(models) - 1:
+                return result
+            print(f"⬆️ {stage}: {model} output rejected ({errors[:3]}), escalating")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"tiers": TIERS, "outcomes": self.stats.snapshot()}
+
+
+model_router = ModelRouter()
@@ -1,4 +1,6 @@
 # app/patterns.py
+import re
+import json
 from enum import Enum
 from typing import Optional
 
@@ -24,13 +26,39 @@ DOMAIN_TO_PATTERN = {
 }
 
 
+# domain이 애매할 때 IR 안의 entity/operation 표현으로 패턴을 추정.
+# 전용 renderer가 있는 패턴만 (FLOW는 아직 renderer가 없으므로 codegen fallback이 낫다),
+# array / compare / matrix / grid / token 처럼 일반 pseudocode에도 흔한 단어는 넣지 않는다.
+PATTERN_HINTS = [
+    (PatternType.SEQ_ATTENTION, re.compile(r"attention|softmax", re.IGNORECASE)),
+    (PatternType.GRID, re.compile(r"convolution|feature_map|kernel|stride", re.IGNORECASE)),
+    (PatternType.SEQUENCE, re.compile(r"swap|\bsort", re.IGNORECASE)),
+]
+PATTERN_HINT_MIN = 2      # 최소 등장 횟수
+PATTERN_HINT_MARGIN = 2   # 2등 힌트보다 이만큼 더 많아야 채택
+
+
 def infer_pattern_type(domain: str, ir: dict | None = None) -> Optional[PatternType]:
     """
     1순위: domain → 패턴 매핑
-    2순위: 나중에 ir 내용을 보고 heuristic 추가 가능
+    2순위: domain이 generic이면 ir 안의 entity type / action 표현 heuristic
+           (가장 많이 등장한 힌트가 2등보다 확실히 많을 때만, 아니면 None → generic fallback)
     """
     if domain in DOMAIN_TO_PATTERN:
         return DOMAIN_TO_PATTERN[domain]
 
-    # TODO: ir 기반 heuristic (ex: "matrix", "heatmap" → GRID 등)
-    return None
+    # cache/math 처럼 분류는 됐지만 전용 패턴이 없는 도메인은 generic fallback 유지
+    if not ir or domain not in ("generic", "", None):
+        return None
+
+    # metadata(title 등)는 빼고 구조 부분만 본다
+    body = json.dumps(
+        {k: v for k, v in ir.items() if k != "metadata"},
+        ensure_ascii=False,
+    )
+    counts = sorted(((len(rx.findall(body)), pattern) for pattern, rx in PATTERN_HINTS),
+                    key=lambda c: c[0], reverse=True)
+    (best_count, best_pattern), (runner_up, _) = counts[0], counts[1]
+    if best_count < PATTERN_HINT_MIN or best_count - runner_up < PATTERN_HINT_MARGIN:
+        return None
+    return best_pattern
@@ -0,0 +1,302 @@
+# app/pipeline.py
+import asyncio
+import tempfile
+
+from app.llm_pseudocode import acall_llm_pseudocode, attach_domain
+from app.llm_anim_ir import acall_llm_anim_ir
+from app.llm_codegen import acall_llm_codegen, discard_llm_codegen
+from app.llm import acall_llm_attention_ir
+from app.llm_domain import acall_llm_detect_domain, abuild_sorting_trace_ir, abuild_cnn_param_ir
+from app.domain_classifier import classify_domain
+
+from app.render_cnn_matrix import render_cnn_matrix
+from app.render_sorting import render_sorting
+from app.render_seq_attention import render_seq_attention
+from app.render_pool import render_scene_file, dry_run_scene_file
+from app.code_gate import check_scene_code
+
+from app.semantic_cache import semantic_cache
+from app.scene_store import scene_store
+from app.scene_compiler import anim_ir_to_scene_ir, render_compiled_scene, SceneCompileError
+from app.schema import validate_attention_ir
+from app.patterns import PatternType, infer_pattern_type
+from app.stage_graph import StageGraph
+from app.async_runtime import run_coroutine
+
+
+def _render_grid(domain: str, cnn_ir: dict) -> dict:
+    cfg = cnn_ir.get("ir", {}).get("params", {})
+    video_path = render_cnn_matrix(
+        cfg,
+        out_basename=cnn_ir.get("basename", "cnn_param_demo"),
+        fmt=cnn_ir.get("out_format", "mp4"),
+    )
+    return {
+        "domain": domain,
+        "pattern_type": PatternType.GRID.value,
+        "cnn_ir": cnn_ir,
+        "video_path": video_path,
+    }
+
+
+def _render_sequence(domain: str, sort_trace: dict) -> dict:
+    video_path = render_sorting(sort_trace)
+    return {"video_path": video_path}
+
+
+def _render_attention(domain: str, attn_ir: dict) -> dict:
+    video_path = render_seq_attention(attn_ir, out_basename="attn_demo")
+    return {
+        "domain": domain,
+        "pattern_type": PatternType.SEQ_ATTENTION.value,
+        "attention_ir": attn_ir,
+        "video_path": video_path,
+    }
+
+
+def _render_generated(manim_code: str) -> str:
+    """
+    LLM codegen(또는 scene store)이 만든 AlgorithmScene 코드를 렌더.
+    정적 검사(+간단한 수리)와 frame 없는 dry run을 통과한 코드만 실제 렌더에 들어간다.
+    실패는 모두 RuntimeError (SceneCodeRejected 포함).
+    """
+    manim_code = check_scene_code(manim_code)
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp:
+        tmp.write(manim_code)
+        tmp_path = tmp.name
+    dry_run_scene_file(tmp_path, "AlgorithmScene")
+    return render_scene_file(tmp_path, "AlgorithmScene", "algorithm_scene", isolated=True)
+
+
+SPECIALISED_RENDERERS = {
+    PatternType.GRID: _render_grid,
+    PatternType.SEQUENCE: _render_sequence,
+    PatternType.SEQ_ATTENTION: _render_attention,
+}
+
+
+def _is_degraded(ir: dict) -> bool:
+    """LLM 장애 때 기본값/예시로 만든 IR (metadata.degraded). cnn_param 문서는 ir["ir"] 안에 metadata가 있다."""
+    for doc in (ir, ir.get("ir")):
+        if isinstance(doc, dict) and (doc.get("metadata") or {}).get("degraded"):
+            return True
+    return False
+
+
+def _remember(user_text: str, domain: str, pattern_type: PatternType, ir: dict):
+    """
+    검증/렌더까지 통과한 IR만 semantic cache에 등록.
+    LLM 장애 fallback으로 만든 IR은 TTL 없이 남으면 같은 요청이 계속 예시 값으로 답하므로 등록하지 않는다.
+    """
+    if _is_degraded(ir):
+        print("🚫 degraded IR not added to semantic cache")
+        return
+    anchors = [ir["raw_text"]] if pattern_type == PatternType.SEQ_ATTENTION and ir.get("raw_text") else []
+    semantic_cache.add(
+        user_text,
+        {"domain": domain, "pattern_type": pattern_type.value, "ir": ir},
+        anchors=anchors,
+    )
+
+
+# 패턴별 전용 IR stage. 분류가 끝나기 전에 로컬 분류기의 추측으로 미리 시작한다.
+SPECULATIVE_STAGES = {
+    PatternType.GRID: "cnn_ir",
+    PatternType.SEQUENCE: "sort_trace",
+    PatternType.SEQ_ATTENTION: "attention_ir",
+}
+FALLBACK_STAGE = "pseudocode"   # generic 패턴 추정 / fallback codegen 의 출발점
+
+
+def _stage_for(pattern_type) -> str | None:
+    if pattern_type is None:
+        return FALLBACK_STAGE
+    return SPECULATIVE_STAGES.get(pattern_type)
+
+
+async def _infer_pattern(g: StageGraph):
+    domain = await g.get("domain")
+    pattern_type = infer_pattern_type(domain)
+    if pattern_type is not None:
+        return pattern_type
+    if domain != "generic":
+        return None
+    # generic이면 pseudocode 내용으로 추정 (어차피 fallback에서도 필요한 stage)
+    pseudo_ir = await g.get("pseudocode_ir")
+    hinted = pseudo_ir.get("pattern_type")
+    if hinted in {p.value for p in PatternType}:
+        return PatternType(hinted)
+    return infer_pattern_type(domain, pseudo_ir)
+
+
+def build_generation_graph(user_text: str) -> StageGraph:
+    """
+    domain → pattern → domain IR → render 가 기본 경로.
+    pseudocode → anim IR → codegen 은 fallback(또는 generic 패턴 추정)에서만 materialize 된다.
+    pseudocode 생성은 domain과 독립이라 분류와 동시에 돌 수 있고, domain은 마지막에 붙인다.
+    """
+    async def pseudocode_ir(g):
+        pseudo, domain = await asyncio.gather(g.get("pseudocode"), g.get("domain"))
+        return attach_domain(pseudo, domain)
+
+    async def anim_ir(g):
+        return await acall_llm_anim_ir(await g.get("pseudocode_ir"))
+
+    async def manim_code(g):
+        return await acall_llm_codegen(await g.get("anim_ir"))
+
+    g = StageGraph(user_text=user_text)
+    g.add("domain", lambda g: acall_llm_detect_domain(user_text))
+    g.add("pattern_type", _infer_pattern)
+    g.add("pseudocode", lambda g: acall_llm_pseudocode(user_text))
+    g.add("pseudocode_ir", pseudocode_ir)
+    g.add("cnn_ir", lambda g: abuild_cnn_param_ir(user_text))
+    g.add("sort_trace", lambda g: abuild_sorting_trace_ir(user_text))
+    g.add("attention_ir", lambda g: acall_llm_attention_ir(user_text))
+    g.add("anim_ir", anim_ir)
+    g.add("manim_code", manim_code)
+    return g
+
+
+def _speculate(g: StageGraph, user_text: str):
+    """
+    로컬 분류기의 1순위 domain으로 필요할 것 같은 IR stage를 domain 분류(LLM)와 동시에 시작.
+    추측이 맞으면 critical path가 LLM 한 번 분량으로 줄고, 틀리면 _route에서 취소된다.
+    """
+    guess, _ = classify_domain(user_text)
+    stage = _stage_for(infer_pattern_type(guess))
+    if stage is not None:
+        g.start(stage)
+    g.start("domain")
+
+
+def _cancel_unneeded(g: StageGraph, pattern_type):
+    needed = _stage_for(pattern_type)
+    for stage in list(SPECULATIVE_STAGES.values()) + [FALLBACK_STAGE]:
+        if stage != needed and g.cancel(stage):
+            print(f"🗑️ speculative stage cancelled: {stage}")
+
+
+def run_generation(user_text: str) -> dict:
+    """
+    자연어 요청 하나를 끝까지 처리한다 (blocking).
+    JobQueue worker thread에서 호출되며, 실제 작업은 공유 event loop 위의 arun_generation 이 한다.
+    """
+    return run_coroutine(arun_generation(user_text))
+
+
+async def arun_generation(user_text: str) -> dict:
+    """
+    LLM stage는 AsyncOpenAI로 동시에/투기적으로 실행하고,
+    manim 렌더처럼 blocking인 부분만 thread로 넘긴다.
+    """
+    # 0️⃣ 표현만 다른 과거 요청이면 LLM 단계를 전부 건너뛴다
+    hit = await asyncio.to_thread(semantic_cache.lookup, user_text)
+    if hit is not None:
+        pattern_type = PatternType(hit["pattern_type"])
+        renderer = SPECIALISED_RENDERERS[pattern_type]
+        result = await asyncio.to_thread(renderer, hit["domain"], hit["ir"])
+        result["semantic_cache_hit"] = True
+        return result
+
+    g = build_generation_graph(user_text)
+    try:
+        _speculate(g, user_text)
+        return await _route(g, user_text)
+    finally:
+        g.close()
+        print(f"🧩 stages executed: {g.timings} (cancelled: {g.cancelled})")
+
+
+async def _route(g: StageGraph, user_text: str) -> dict:
+    # 1️⃣ 자연어 → domain (pseudocode는 필요할 때만)
+    domain = await g.get("domain")
+
+    # 2️⃣ domain (+ generic이면 pseudocode IR) → pattern_type 추론
+    pattern_type = await g.get("pattern_type")
+    _cancel_unneeded(g, pattern_type)
+
+    # 3️⃣ 패턴 타입 기준 라우팅
+
+    # --- (A) GRID: CNN / 행렬 계열 ---
+    if pattern_type == PatternType.GRID:
+        # CNN 같은 경우 도메인 전용 IR 한 번 더 뽑는다 (수치를 직접 읽을 수 있으면 LLM 생략)
+        cnn_ir = await g.get("cnn_ir")
+        result = await asyncio.to_thread(_render_grid, domain, cnn_ir)
+        await asyncio.to_thread(_remember, user_text, domain, pattern_type, cnn_ir)
+        return result
+
+    # --- (B) SEQUENCE: 정렬, step-by-step ---
+    if pattern_type == PatternType.SEQUENCE:
+        sort_trace = await g.get("sort_trace")
+        result = await asyncio.to_thread(_render_sequence, domain, sort_trace)
+        await asyncio.to_thread(_remember, user_text, domain, pattern_type, sort_trace)
+        return result
+
+    # --- (C) SEQ_ATTENTION: self-attention 시각화 ---
+    if pattern_type == PatternType.SEQ_ATTENTION:
+        attn_ir = await g.get("attention_ir")
+        errors = validate_attention_ir(attn_ir)
+        if errors:
+            return {
+                "domain": domain,
+                "pattern_type": pattern_type.value,
+                "errors": errors,
+            }
+
+        result = await asyncio.to_thread(_render_attention, domain, attn_ir)
+        await asyncio.to_thread(_remember, user_text, domain, pattern_type, attn_ir)
+        return result
+
+    # --- (D) FLOW: 나중에 파이프라인 애니메이션용 ---
+    if pattern_type == PatternType.FLOW:
+        return {
+            "domain": domain,
+            "pattern_type": pattern_type.value,
+            "message": "flow pattern not implemented yet",
+        }
+
+    # --- (E) fallback: generic anim_ir → scene compiler (안 되면 scene store / codegen) ---
+    pseudo_ir = await g.get("pseudocode_ir")
+    anim_ir = await g.get("anim_ir")
+
+    result = {
+        "domain": domain,
+        "pattern_type": None,
+        "pseudocode_ir": pseudo_ir,
+        "anim_ir": anim_ir,
+        "message": "🎬 fallback generic visualization finished",
+    }
+
+    # 고정 op vocabulary로 표현되는 anim IR이면 codegen 없이 템플릿으로 compile
+    try:
+        scene_ir = anim_ir_to_scene_ir(anim_ir)
+        result["video_path"] = await asyncio.to_thread(render_compiled_scene, scene_ir)
+        result["scene_ir"] = scene_ir
+        return result
+    except SceneCompileError as e:
+        print(f"🧱 scene compiler skipped: {e}")
+    except RuntimeError as e:
+        print(f"⚠️ compiled scene failed to render, falling back to codegen: {e}")
+
+    # 구조가 같은 anim IR로 렌더에 성공했던 코드가 있으면 codegen 없이 라벨만 바꿔 재사용
+    reused_code = await asyncio.to_thread(scene_store.lookup, anim_ir)
+    if reused_code is not None:
+        try:
+            result["video_path"] = await asyncio.to_thread(_render_generated, reused_code)
+            result["scene_store_hit"] = True
+            return result
+        except RuntimeError as e:
+            print(f"⚠️ reused scene failed to render, regenerating: {e}")
+            await asyncio.to_thread(scene_store.discard, anim_ir)
+
+    manim_code = await g.get("manim_code")
+    # LLM이 만든 코드는 깨질 수 있으므로 렌더 실패는 job 실패가 아니라 결과에 기록
+    try:
+        result["video_path"] = await asyncio.to_thread(_render_generated, manim_code)
+    except RuntimeError as e:
+        result["error"] = str(e)
+        await asyncio.to_thread(discard_llm_codegen, anim_ir)
+    else:
+        await asyncio.to_thread(scene_store.add, anim_ir, manim_code)
+    return result
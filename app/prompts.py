@@ -67,11 +67,30 @@ Extract ONLY the array and generate a full bubble-sort-like trace.
 Output JSON with keys:
 - algorithm
 - input.array
-- trace[{step, compare, swap, array}]
+- trace[{{step, compare, swap, array}}]
         """
     },
 
 
+    "attention_sentence": {
+        "system": "You extract the example input sentence for a transformer visualization. Output ONLY JSON.",
+        "template": """
+The USER REQUEST asks how a transformer processes an example sentence
+(self-attention, next token prediction, ...). It may mix Korean explanation and an English example.
+
+Extract ONLY the short example input sequence that should be fed into the transformer.
+- Prefer the English part that looks like an example sentence, e.g. "I want to play".
+- Do NOT include the surrounding question or technical terms (attention, next token, transformer).
+- If there is no clear example, choose a short natural English sentence (3–6 tokens) that fits the request.
+
+Output JSON:
+{{"raw_text": "<the extracted input sequence>"}}
+
+USER REQUEST:
+{text}
+"""
+    },
+
     "seq_attention": {
         "system": "You are a precise JSON generator for transformer self-attention & next-token visualization. Output ONLY JSON.",
         "template": """
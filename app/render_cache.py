@@ -0,0 +1,123 @@
+# app/render_cache.py
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from app.render_pool import RENDER_QUALITY
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+RENDER_CACHE_DIR = Path(os.getenv("RENDER_CACHE_DIR", "media/render_cache"))
+RENDER_CACHE_MAX_MB = int(os.getenv("RENDER_CACHE_MAX_MB", "2048"))
+RENDER_LOCK_STRIPES = int(os.getenv("RENDER_LOCK_STRIPES", "64"))
+
+
+def canonical_json(obj: Any) -> str:
+    """key 순서/공백 차이가 hash에 영향을 주지 않도록 정규화된 JSON 문자열."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def render_key(pattern: str, ir: Dict[str, Any], quality: str, fmt: str, scene_version: str) -> str:
+    payload = canonical_json({
+        "pattern": pattern,
+        "ir": ir,
+        "quality": quality,
+        "format": fmt,
+        "scene_version": scene_version,
+    })
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    렌더 결과 영상을 content hash 경로(<root>/<key[:2]>/<key>.<fmt>)에 보관하는 disk store.
+    - 조회 시 mtime을 갱신해서 LRU 순서로 사용
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 안 쓴 파일부터 삭제
+    """
+
+    def __init__(self, root: Path = RENDER_CACHE_DIR, max_bytes: int = RENDER_CACHE_MAX_MB * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str, fmt: str) -> Path:
+        return self.root / key[:2] / f"{key}.{fmt}"
+
+    def get(self, key: str, fmt: str) -> Optional[str]:
+        path = self.path_for(key, fmt)
+        try:
+            os.utime(path)  # LRU 갱신
+        except FileNotFoundError:
+            return None
+        return str(path.resolve())
+
+    def put(self, key: str, fmt: str, src_path: str) -> str:
+        dst = self.path_for(key, fmt)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+
+        # 같은 파일시스템 안에서 임시 이름으로 옮긴 뒤 rename → 반쯤 쓰인 파일이 보이지 않음
+        tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+        shutil.move(src_path, tmp)
+        os.replace(tmp, dst)
+
+        self.evict(keep=dst)
+        return str(dst.resolve())
+
+    def evict(self, keep: Optional[Path] = None):
+        """방금 넣은 파일(keep)은 예산을 넘더라도 지우지 않는다."""
+        with self._lock:
+            files = []
+            total = 0
+            for p in self.root.glob("*/*"):
+                if p.name.startswith(".") or p == keep:
+                    continue
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+
+            files.sort()
+            for _, size, p in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    p.unlink()
+                    total -= size
+                    print(f"🧹 render cache evicted: {p.name}")
+                except FileNotFoundError:
+                    pass
+
+
+artifact_store = ArtifactStore()
+
+# 같은 key를 동시에 렌더하지 않도록 key hash로 고른 lock (개수가 고정이라 key가 늘어도 메모리가 늘지 않는다).
+# 서로 다른 key가 같은 stripe에 걸리면 잠깐 순서대로 렌더될 뿐이다
+_key_locks = [threading.Lock() for _ in range(RENDER_LOCK_STRIPES)]
+
+
+def _lock_for(key: str) -> threading.Lock:
+    return _key_locks[int(key[:8], 16) % len(_key_locks)]
+
+
+def cached_render(pattern: str, ir: Dict[str, Any], fmt: str, scene_version: str,
+                  render_fn: Callable[[str], str], basename: str) -> str:
+    """
+    (pattern, canonical IR, quality, format, scene_version) hash로 store를 먼저 조회.
+    miss일 때만 render_fn("<basename>_<hash>")을 호출하고 결과를 store에 넣는다.
+    """
+    key = render_key(pattern, ir, RENDER_QUALITY, fmt, scene_version)
+
+    with _lock_for(key):
+        hit = artifact_store.get(key, fmt)
+        if hit:
+            print(f"♻️ render cache hit: {pattern} {key[:12]}")
+            return hit
+
+        out_path = render_fn(f"{basename}_{key[:16]}")
+        return artifact_store.put(key, fmt, out_path)
@@ -0,0 +1,424 @@
+# app/render_pool.py
+import os
+import sys
+import json
+import uuid
+import tempfile
+import threading
+import importlib
+import subprocess
+import importlib.util
+import multiprocessing as mp
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from app.asset_cache import cli_config_file
+
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))                    # 0이면 manim CLI subprocess 사용
+RENDER_MAX_TASKS_PER_CHILD = int(os.getenv("RENDER_MAX_TASKS_PER_CHILD", "50"))  # 메모리 누수 방지용 재시작 주기
+RENDER_QUALITY = os.getenv("RENDER_QUALITY", "low_quality")
+DRY_RUN_TIMEOUT_SEC = float(os.getenv("DRY_RUN_TIMEOUT_SEC", "20"))   # construct()가 끝나지 않는 코드 차단
+RENDER_PREFETCH = os.getenv("RENDER_PREFETCH", "1") == "1"               # 렌더 전 라벨 SVG 일괄 생성
+SANDBOX_WORKERS = int(os.getenv("SANDBOX_WORKERS", "1"))                  # LLM 생성 코드 전용 (작업마다 새 프로세스)
+
+# manim quality 이름 → (CLI 플래그, 출력 폴더 이름)
+QUALITY_FLAGS = {
+    "low_quality": ("-ql", "480p15"),
+    "medium_quality": ("-qm", "720p30"),
+    "high_quality": ("-qh", "1080p60"),
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_sandbox_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+# ---------- worker 프로세스 쪽 ----------
+def _init_worker():
+    """worker 시작 시 한 번만: 무거운 manim import + 폰트/Pango 초기화를 미리 끝내 둔다."""
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    import manim  # noqa: F401
+    import app.layout_utils  # noqa: F401
+    import app.scenes  # noqa: F401  (scene 클래스는 worker마다 한 번만 import)
+    from app.asset_cache import configure_manim, prewarm
+
+    try:
+        configure_manim()   # 공유 Tex/Text SVG 캐시 (lock + atomic rename)
+        prewarm()
+    except Exception as e:
+        # LaTeX 미설치 등: 캐시 없이도 렌더는 되므로 worker 시작은 막지 않는다
+        print(f"⚠️ asset cache setup skipped: {type(e).__name__}: {e}")
+
+
+def _init_sandbox_worker():
+    """
+    생성 코드 전용 worker: 작업 하나만 하고 종료하므로 prewarm은 하지 않는다.
+    (모듈 최상위 코드가 manim 전역 상태를 바꿔도 공유 render worker에는 남지 않는다)
+    """
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    import manim  # noqa: F401
+    from app.asset_cache import configure_manim
+
+    try:
+        configure_manim()
+    except Exception as e:
+        print(f"⚠️ asset cache setup skipped: {type(e).__name__}: {e}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _load_scene_class(scene_path: str, scene_name: str):
+    spec = importlib.util.spec_from_file_location(f"_scene_{uuid.uuid4().hex}", scene_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, scene_name)
+
+
+def _dry_run_in_worker(scene_path: str, scene_name: str) -> int:
+    """
+    construct()를 끝까지 실행만 해 본다: 애니메이션은 마지막 상태로 건너뛰고 frame은 그리지 않는다.
+    NameError / 잘못된 인자 같은 오류가 렌더 도중이 아니라 수십 ms 안에 드러난다. 반환값은 play 횟수.
+    """
+    from manim import tempconfig
+
+    scene_cls = _load_scene_class(scene_path, scene_name)
+    overrides = {
+        "input_file": scene_path,
+        "dry_run": True,
+        "write_to_movie": False,
+        "save_last_frame": False,
+        "disable_caching": True,
+        "preview": False,
+        "progress_bar": "none",
+    }
+    with tempconfig(overrides):
+        scene = scene_cls(skip_animations=True)
+        scene.renderer.update_frame = lambda *args, **kwargs: None   # rasterize 생략
+        scene.render()
+        return scene.renderer.num_plays
+
+
+def _import_scene_class(class_path: str):
+    """"app.scenes.sorting:SortingScene" → class (이미 import된 모듈이면 그대로 재사용)."""
+    module_name, _, class_name = class_path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _scene_stem(class_path: str) -> str:
+    """출력 폴더 이름: "app.scenes.sorting:SortingScene" → "sorting" (CLI stub 파일 이름과 동일)."""
+    return class_path.partition(":")[0].rsplit(".", 1)[-1]
+
+
+def _render_with_config(make_scene, input_file: str, out_basename: str,
+                        fmt: str, quality: str) -> str:
+    from manim import tempconfig
+
+    overrides = {
+        "input_file": input_file,   # 출력 폴더 이름(media/videos/<stem>/...)을 CLI와 동일하게
+        "quality": quality,
+        "format": fmt,
+        "output_file": out_basename,
+        "write_to_movie": True,
+        "preview": False,
+        "progress_bar": "none",
+    }
+    with tempconfig(overrides):
+        scene = make_scene()
+        scene.render()
+        writer = scene.renderer.file_writer
+        out = writer.gif_file_path if fmt == "gif" else writer.movie_file_path
+    _log_asset_caches()
+    return str(Path(out).resolve())
+
+
+def _log_asset_caches():
+    """worker 누적 Text 캐시 / glyph atlas / SVG 캐시 통계 (worker마다 따로 쌓인다)."""
+    from app.layout_utils import text_factory, glyph_atlas
+    from app.asset_cache import asset_cache
+
+    asset_cache.after_render()
+
+    s = text_factory.stats()
+    if s["hits"] + s["misses"]:
+        print(f"🔤 text cache [{os.getpid()}]: {s['hits']} hit / {s['misses']} miss "
+              f"(hit rate {s['hit_rate']}), ~{s['saved_sec_est']}s saved")
+    g = glyph_atlas.stats()
+    if g["composed"] + g["fallbacks"]:
+        print(f"🔢 glyph atlas [{os.getpid()}]: {g['composed']} numbers composed, {g['fallbacks']} MathTex fallback")
+    a = asset_cache.stats()
+    print(f"🗂️ svg cache [{os.getpid()}]: {a['hits']} hit / {a['compiles']} compiled")
+
+
+def _render_in_worker(scene_path: str, scene_name: str, out_basename: str,
+                      fmt: str, quality: str) -> str:
+    """scene 파일을 모듈로 로드해서 격리된 tempconfig 안에서 바로 렌더."""
+    scene_cls = _load_scene_class(scene_path, scene_name)
+    return _render_with_config(scene_cls, scene_path, out_basename, fmt, quality)
+
+
+def _render_class_in_worker(class_path: str, ir: dict, out_basename: str,
+                            fmt: str, quality: str) -> str:
+    """app.scenes 클래스에 IR을 생성자 인자로 넘겨 렌더 (scene 소스 생성 / 파일 parse 없음)."""
+    scene_cls = _import_scene_class(class_path)
+    return _render_with_config(lambda: scene_cls(ir), f"{_scene_stem(class_path)}.py",
+                               out_basename, fmt, quality)
+
+
+def _plan_assets_in_worker(class_path: str, ir: dict) -> dict:
+    """
+    scene 클래스가 이 IR로 만들 라벨 중 아직 캐시에 없을 것만 추린다.
+    PREWARM_TEXTS는 모든 worker가 시작할 때 만들어 두므로 제외, MathTex는 공유 디스크에 없는 것만.
+    """
+    from manim import config
+    from app.asset_cache import TEX_DIR, tex_key
+
+    scene_cls = _import_scene_class(class_path)
+    texts, tex = scene_cls.prefetch_labels(ir)
+    warm = {(t, float(s), str(c)) for t, s, c in scene_cls.PREWARM_TEXTS}
+    specs = list(dict.fromkeys((t, float(s), str(c)) for t, s, c in texts))
+    tex = [e for e in dict.fromkeys(tex)
+           if not (TEX_DIR / f"{tex_key(e.strip(), 'align*', config.tex_template)}.svg").exists()]
+    return {"texts": [spec for spec in specs if spec not in warm], "tex": tex}
+
+
+def _prefetch_texts_in_worker(specs: list) -> int:
+    from app.layout_utils import cached_text
+
+    for text, font_size, color in specs:
+        cached_text(text, font_size=font_size, color=color)
+    return len(specs)
+
+
+def _prefetch_tex_in_worker(expressions: list) -> int:
+    from app.asset_cache import asset_cache
+
+    return asset_cache.batch_tex(expressions)
+
+
+# ---------- API 프로세스 쪽 ----------
+def get_render_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # uvicorn/job 스레드가 살아있는 프로세스를 fork하지 않도록 spawn 사용
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                max_tasks_per_child=RENDER_MAX_TASKS_PER_CHILD,
+            )
+        return _pool
+
+
+def get_sandbox_pool() -> ProcessPoolExecutor:
+    """LLM이 만든 scene 코드용 pool: max_tasks_per_child=1 이라 작업마다 깨끗한 프로세스."""
+    global _sandbox_pool
+    with _pool_lock:
+        if _sandbox_pool is None:
+            _sandbox_pool = ProcessPoolExecutor(
+                max_workers=SANDBOX_WORKERS,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_sandbox_worker,
+                max_tasks_per_child=1,
+            )
+        return _sandbox_pool
+
+
+def warm_up_render_pool():
+    """서버 시작 시 호출: worker들을 미리 띄워서 첫 요청이 import 비용을 내지 않게 한다."""
+    if RENDER_WORKERS <= 0:
+        return
+    pool = get_render_pool()
+    pids = {f.result() for f in [pool.submit(_ping) for _ in range(RENDER_WORKERS)]}
+    print(f"🔥 render pool warm: {len(pids)} worker(s)")
+
+
+def shutdown_render_pool():
+    global _pool, _sandbox_pool
+    with _pool_lock:
+        for pool in (_pool, _sandbox_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _sandbox_pool = None
+
+
+def _reset_broken_pool(broken: ProcessPoolExecutor):
+    global _pool, _sandbox_pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+        if _sandbox_pool is broken:
+            _sandbox_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _kill_pool(pool: ProcessPoolExecutor):
+    """끝나지 않는 작업을 잡고 있는 worker까지 종료 (shutdown만으로는 실행 중인 작업이 멈추지 않는다)."""
+    processes = list(getattr(pool, "_processes", {}).values())
+    _reset_broken_pool(pool)
+    for p in processes:
+        p.terminate()
+
+
+def _dry_run_with_subprocess(scene_path: str, scene_name: str):
+    code = ("import sys; from app.asset_cache import configure_manim; configure_manim(); "
+            "from app.render_pool import _dry_run_in_worker; _dry_run_in_worker(sys.argv[1], sys.argv[2])")
+    env = os.environ.copy()
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    try:
+        subprocess.run([sys.executable, "-c", code, scene_path, scene_name], check=True, env=env,
+                       timeout=DRY_RUN_TIMEOUT_SEC, capture_output=True, text=True)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"dry run timed out after {DRY_RUN_TIMEOUT_SEC}s")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"dry run failed: {(e.stderr or '').strip().splitlines()[-1:]}")
+
+
+def dry_run_scene_file(scene_path: str, scene_name: str):
+    """
+    렌더 전에 scene 코드를 frame 없이 한 번 실행. 실패하면 RuntimeError.
+    공유 render worker가 아니라 sandbox pool(작업마다 새 프로세스)에서 실행하므로
+    timeout이 나도 그 프로세스만 종료되고, 모듈 최상위 코드의 부작용도 남지 않는다.
+    worker pool을 쓰지 않는 설정이면 subprocess로.
+    """
+    if RENDER_WORKERS <= 0:
+        return _dry_run_with_subprocess(scene_path, scene_name)
+
+    pool = get_sandbox_pool()
+    future = pool.submit(_dry_run_in_worker, scene_path, scene_name)
+    try:
+        plays = future.result(timeout=DRY_RUN_TIMEOUT_SEC)
+    except FutureTimeoutError:
+        _kill_pool(pool)
+        raise RuntimeError(f"dry run timed out after {DRY_RUN_TIMEOUT_SEC}s")
+    except BrokenProcessPool as e:
+        _reset_broken_pool(pool)
+        raise RuntimeError(f"Manim render worker crashed during dry run: {e}")
+    except Exception as e:
+        raise RuntimeError(f"dry run failed: {type(e).__name__}: {e}")
+    print(f"🧪 dry run ok: {scene_name} ({plays} plays)")
+
+
+def _render_with_cli(scene_path: str, scene_name: str, out_basename: str,
+                     fmt: str, quality: str) -> str:
+    flag, res_dir = QUALITY_FLAGS[quality]
+    cmd = ["manim", flag, scene_path, scene_name, "--format", fmt, "-o", f"{out_basename}.{fmt}",
+           "--config_file", cli_config_file()]   # Tex/Text SVG는 worker pool과 같은 공유 root
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    try:
+        subprocess.run(cmd, check=True, env=env)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Manim rendering failed: {e}")
+
+    return str(Path("media", "videos", Path(scene_path).stem, res_dir, f"{out_basename}.{fmt}").resolve())
+
+
+def _render_in_pool(fn, *args, pool: Optional[ProcessPoolExecutor] = None) -> str:
+    pool = pool or get_render_pool()
+    try:
+        future = pool.submit(fn, *args)
+        return future.result()
+    except BrokenProcessPool as e:
+        # worker가 죽으면 pool을 새로 만들도록 비워두고 이번 요청은 실패 처리
+        _reset_broken_pool(pool)
+        raise RuntimeError(f"Manim render worker crashed: {e}")
+    except Exception as e:
+        print("🔥 Manim render failed:", e)
+        raise RuntimeError(f"Manim rendering failed: {e}")
+
+
+def render_scene_file(scene_path: str, scene_name: str, out_basename: str,
+                      fmt: str = "mp4", quality: str = RENDER_QUALITY, isolated: bool = False) -> str:
+    """
+    scene 파일 하나를 렌더하고 결과 영상의 절대 경로를 반환.
+    RENDER_WORKERS > 0 이면 warm worker pool, 아니면 manim CLI.
+    isolated=True (LLM 생성 코드)면 공유 worker 대신 sandbox pool에서 렌더.
+    """
+    if quality not in QUALITY_FLAGS:
+        raise ValueError(f"Unknown quality: {quality}")
+
+    if RENDER_WORKERS <= 0:
+        return _render_with_cli(scene_path, scene_name, out_basename, fmt, quality)
+
+    pool = get_sandbox_pool() if isolated else None
+    return _render_in_pool(_render_in_worker, scene_path, scene_name, out_basename, fmt, quality, pool=pool)
+
+
+# manim CLI는 파일 + class 이름만 받으므로, IR JSON 경로를 박아 둔 몇 줄짜리 stub을 만든다
+CLI_STUB_TEMPLATE = """from app.scenes import load_ir
+from {module} import {name} as _Base
+
+
+class {name}(_Base):
+    def __init__(self, **kwargs):
+        super().__init__(load_ir({ir_path!r}), **kwargs)
+"""
+
+
+def _render_class_with_cli(class_path: str, ir: dict, out_basename: str,
+                           fmt: str, quality: str) -> str:
+    module, _, name = class_path.partition(":")
+    tmpdir = Path(tempfile.mkdtemp())
+    ir_path = tmpdir / "ir.json"
+    ir_path.write_text(json.dumps(ir, ensure_ascii=False), encoding="utf-8")
+    stub_path = tmpdir / f"{_scene_stem(class_path)}.py"
+    stub_path.write_text(CLI_STUB_TEMPLATE.format(module=module, name=name, ir_path=str(ir_path)),
+                         encoding="utf-8")
+    return _render_with_cli(str(stub_path), name, out_basename, fmt, quality)
+
+
+def render_scene_class(class_path: str, ir: dict, out_basename: str,
+                       fmt: str = "mp4", quality: str = RENDER_QUALITY) -> str:
+    """
+    app.scenes의 scene 클래스("module:Class")를 IR과 함께 렌더하고 결과 영상의 절대 경로를 반환.
+    worker pool이면 IR dict를 그대로 넘기고, CLI면 IR JSON 파일 + stub 모듈로 넘긴다.
+    """
+    if quality not in QUALITY_FLAGS:
+        raise ValueError(f"Unknown quality: {quality}")
+
+    if RENDER_WORKERS <= 0:
+        return _render_class_with_cli(class_path, ir, out_basename, fmt, quality)
+
+    if RENDER_PREFETCH:
+        prefetch_scene_assets(class_path, ir)
+    return _render_in_pool(_render_class_in_worker, class_path, ir, out_basename, fmt, quality)
+
+
+def prefetch_scene_assets(class_path: str, ir: dict):
+    """
+    construct() 전에 IR에서 나올 라벨 SVG를 미리 만든다: MathTex는 worker 하나에서 LaTeX 1회로 일괄,
+    Text는 worker 수만큼 나눠 동시에. 결과는 공유 asset cache에 남으므로 렌더 worker는 캐시만 읽는다.
+    실패해도 렌더는 그대로 진행 (construct에서 평소대로 생성).
+    """
+    pool = get_render_pool()
+    try:
+        plan = pool.submit(_plan_assets_in_worker, class_path, ir).result()
+        futures = []
+        if plan["tex"]:
+            futures.append(pool.submit(_prefetch_tex_in_worker, plan["tex"]))
+        texts = plan["texts"]
+        for i in range(min(RENDER_WORKERS, len(texts))):
+            futures.append(pool.submit(_prefetch_texts_in_worker, texts[i::RENDER_WORKERS]))
+        for f in futures:
+            f.result()
+    except BrokenProcessPool as e:
+        _reset_broken_pool(pool)
+        print(f"⚠️ asset prefetch skipped (worker crashed): {e}")
+        return
+    except Exception as e:
+        print(f"⚠️ asset prefetch failed: {type(e).__name__}: {e}")
+        return
+    if plan["texts"] or plan["tex"]:
+        print(f"📦 prefetched {len(plan['texts'])} text / {len(plan['tex'])} tex label(s) for {class_path}")
@@ -0,0 +1,226 @@
+# app/scene_compiler.py
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined
+
+from app.render_pool import render_scene_file
+from app.render_cache import cached_render
+from app.schema import schema_errors, invariants_errors
+
+# scene_template.py.j2 나 compile 규칙을 바꾸면 올려서 기존 render cache를 무효화
+SCENE_VERSION = "2"
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+JINJA_CACHE_DIR = Path(os.getenv("JINJA_CACHE_DIR", "cache/jinja"))
+
+# 허용하는 op와 별칭 (anim IR의 animation 이름도 여기로 모인다)
+OP_ALIASES = {
+    "compare": "compare",
+    "swap": "swap",
+    "highlight": "highlight", "indicate": "highlight", "read": "highlight",
+    "move": "move",
+    "fade_in": "fade_in", "create": "fade_in", "appear": "fade_in",
+    "fade_out": "fade_out", "remove": "fade_out", "disappear": "fade_out",
+    "enqueue": "enqueue", "insert": "enqueue", "push": "enqueue",
+    "evict": "evict", "dequeue": "evict", "pop": "evict",
+    "flow": "flow", "send": "flow", "call": "flow",
+}
+
+# op별로 반드시 있어야 하는 참조 (없으면 compile 불가 → codegen으로)
+REQUIRED_REFS = {
+    "compare": ("from", "to"),
+    "swap": ("from", "to"),
+    "flow": ("from", "to"),
+    "highlight": ("target",),
+    "move": ("target",),
+    "fade_in": ("target",),
+    "fade_out": ("target",),
+    "enqueue": ("target",),
+    "evict": ("target",),
+}
+
+FRAME_X, FRAME_Y = 6.5, 3.2   # 컴포넌트 중심이 화면 밖으로 나가지 않게 자르는 범위
+MAX_LABEL_CHARS = 24
+MAX_CAPTION_CHARS = 60
+
+
+class SceneCompileError(ValueError):
+    """IR이 고정 vocabulary로 표현되지 않음 (호출부는 LLM codegen으로 넘어간다)."""
+
+
+def _py(value: Any) -> str:
+    """템플릿에 값을 넣는 유일한 통로: Python literal (문자열 escape 포함)."""
+    return repr(value)
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache:
+    """템플릿 compile 결과를 디스크에 남겨 worker 재시작 때도 parse를 건너뛴다."""
+    JINJA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(str(JINJA_CACHE_DIR))
+
+
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATE_DIR)),
+    bytecode_cache=_bytecode_cache(),
+    undefined=StrictUndefined,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True,
+    autoescape=False,
+)
+_env.filters["py"] = _py
+_template = _env.get_template("scene_template.py.j2")   # import 시 한 번 compile (bytecode cache 재사용)
+
+
+def _clip(text: Any, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _position(pos: Any) -> Optional[List[float]]:
+    if not isinstance(pos, (list, tuple)) or not 2 <= len(pos) <= 3:
+        return None
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in pos):
+        return None
+    x, y = float(pos[0]), float(pos[1])
+    return [max(-FRAME_X, min(FRAME_X, x)), max(-FRAME_Y, min(FRAME_Y, y)), 0.0]
+
+
+def anim_ir_to_scene_ir(anim_ir: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    generic 경로의 anim IR(layout / actions) → JSON_IR_SCHEMA 모양의 component/event IR.
+    vocabulary에 없는 animation이나 대상이 모호한 action이 있으면 SceneCompileError.
+    """
+    components = []
+    for e in anim_ir.get("layout") or []:
+        if not isinstance(e, dict) or not isinstance(e.get("id"), str):
+            raise SceneCompileError(f"layout item without id: {e}")
+        comp: Dict[str, Any] = {"id": e["id"], "label": str(e.get("label") or e.get("text") or e["id"])}
+        pos = _position(e.get("position"))
+        if pos is not None:
+            comp["pos"] = pos
+        if isinstance(e.get("shape"), str):
+            comp["style"] = {"shape": e["shape"].lower()}
+        components.append(comp)
+
+    actions = [a for a in anim_ir.get("actions") or [] if isinstance(a, dict)]
+    actions.sort(key=lambda a: a.get("step") if isinstance(a.get("step"), (int, float)) else 0)
+    events = []
+    for i, a in enumerate(actions):
+        op = OP_ALIASES.get(str(a.get("animation", "")).lower())
+        if op is None:
+            raise SceneCompileError(f"unsupported animation: {a.get('animation')}")
+        event: Dict[str, Any] = {"t": round(0.5 * i, 2), "op": op}
+        target = a.get("target")
+        if isinstance(target, list) and len(target) == 2:
+            event["from"], event["to"] = str(target[0]), str(target[1])
+        elif isinstance(target, str):
+            if REQUIRED_REFS[op] == ("from", "to"):
+                event["from"], event["to"] = target, a.get("to")
+            else:
+                event["target"] = target
+                if isinstance(a.get("to"), str):
+                    event["to"] = a["to"]
+        for key in ("from", "to", "item"):
+            if isinstance(a.get(key), str):
+                event[key] = a[key]
+        pos = _position(a.get("position"))
+        if pos is not None:
+            event["data"] = pos
+        if a.get("description"):
+            event["caption"] = str(a["description"])
+        events.append({k: v for k, v in event.items() if v is not None})
+
+    return {
+        "components": components,
+        "events": events,
+        "metadata": {"view": "flow", **(anim_ir.get("metadata") or {})},
+    }
+
+
+def _auto_layout(components: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """pos 없는 컴포넌트는 가로 한 줄로, 개수에 맞춰 폭을 줄인다."""
+    n = max(1, len(components))
+    width = min(2.6, 12.0 / n - 0.2)
+    out = []
+    for i, c in enumerate(components):
+        pos = _position(c.get("pos")) or [round(-6.0 + width / 2 + 0.1 + i * (width + 0.2), 3), 0.0, 0.0]
+        out.append({
+            "id": c["id"],
+            "label": _clip(c.get("label", c["id"]), MAX_LABEL_CHARS),
+            "pos": pos,
+            "shape": (c.get("style") or {}).get("shape", "box"),
+            "width": round(width, 3),
+            "height": 1.0,
+        })
+    return out
+
+
+def _event_view(e: Dict[str, Any]) -> Dict[str, Any]:
+    op = OP_ALIASES.get(e["op"])
+    if op is None:
+        raise SceneCompileError(f"unsupported op: {e['op']}")
+    missing = [k for k in REQUIRED_REFS[op] if not e.get(k)]
+    if missing:
+        raise SceneCompileError(f"{op} event needs {missing}: {e}")
+    if op == "move" and not e.get("to") and _position(e.get("data")) is None:
+        raise SceneCompileError(f"move event needs 'to' or a position: {e}")
+    data = e.get("data")
+    return {
+        "op": op,
+        "src": e.get("from"),
+        "dst": e.get("to"),
+        "target": e.get("target"),
+        "item": _clip(e.get("item") or (data if isinstance(data, str) else "") or "●", 8),
+        "pos": _position(data),
+        "label": _clip(e.get("item") or (data if isinstance(data, str) else "") or op, MAX_LABEL_CHARS),
+        "caption": _clip(e["caption"], MAX_CAPTION_CHARS) if e.get("caption") else "",
+    }
+
+
+def compile_scene(ir: Dict[str, Any]) -> str:
+    """
+    JSON_IR_SCHEMA IR → IRScene Python 코드.
+    같은 IR이면 항상 같은 코드. 스키마/불변식/vocabulary를 벗어나면 SceneCompileError.
+    """
+    errors = schema_errors(ir) + invariants_errors(ir)
+    if errors:
+        raise SceneCompileError("; ".join(errors[:5]))
+
+    components = _auto_layout(ir["components"])
+    events = [_event_view(e) for e in sorted(ir["events"], key=lambda e: e["t"])]
+    # 처음 등장이 fade_in인 컴포넌트는 그 event 때 나타난다
+    first_op: Dict[str, str] = {}
+    for e in events:
+        for ref in (e["src"], e["dst"], e["target"]):
+            if ref:
+                first_op.setdefault(ref, e["op"])
+    initial = [c["id"] for c in components if first_op.get(c["id"]) != "fade_in"]
+
+    title = (ir.get("metadata") or {}).get("title")
+    return _template.render(
+        title=_clip(title, 40) if title else "",
+        components=components,
+        events=events,
+        initial=initial,
+    )
+
+
+def _render_compiled_scene(scene_code: str, out_basename: str, fmt: str) -> str:
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp:
+        tmp.write(scene_code)
+        tmp_path = tmp.name
+    return render_scene_file(tmp_path, "IRScene", out_basename, fmt=fmt)
+
+
+def render_compiled_scene(ir: Dict[str, Any], out_basename: str = "ir_scene", fmt: str = "mp4") -> str:
+    """compile → 렌더. compile이 안 되면 렌더 pool에 가기 전에 SceneCompileError, 같은 IR이면 render cache."""
+    scene_code = compile_scene(ir)
+    return cached_render(
+        "compiled_ir", ir, fmt, SCENE_VERSION,
+        lambda basename: _render_compiled_scene(scene_code, basename, fmt),
+        basename=out_basename,
+    )
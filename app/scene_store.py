@@ -0,0 +1,202 @@
+# app/scene_store.py
+import io
+import os
+import ast
+import json
+import time
+import sqlite3
+import hashlib
+import tokenize
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+SCENE_STORE_PATH = Path(os.getenv("SCENE_STORE_PATH", "cache/scene_store.sqlite3"))
+SCENE_STORE_MAX_ENTRIES = int(os.getenv("SCENE_STORE_MAX_ENTRIES", "1000"))
+SCENE_STORE_ENABLED = os.getenv("SCENE_STORE_ENABLED", "1") != "0"
+
+
+def _actions(anim_ir: Dict[str, Any]) -> List[Dict[str, Any]]:
+    actions = [a for a in anim_ir.get("actions") or [] if isinstance(a, dict)]
+    return sorted(actions, key=lambda a: a.get("step") if isinstance(a.get("step"), (int, float)) else 0)
+
+
+def _layout(anim_ir: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [e for e in anim_ir.get("layout") or [] if isinstance(e, dict)]
+
+
+def _ref(index: Dict[Any, int], value: Any) -> Any:
+    """layout id (또는 compare/swap/flow의 [a, b]) → layout index. 없는 id는 -1."""
+    if isinstance(value, list):
+        return [_ref(index, v) for v in value]
+    if isinstance(value, str):
+        return index.get(value, -1)
+    return -1
+
+
+def structural_signature(anim_ir: Dict[str, Any]) -> str:
+    """
+    anim IR의 '모양'만 남긴 hash: domain, layout 항목의 shape 순서,
+    action의 (animation, 대상 index, "to" index, 이동 좌표) 순서.
+    id / 라벨 / 설명 / item / layout 좌표가 달라도 같은 signature면 같은 scene 코드로 그릴 수 있다고 본다.
+    (action의 position은 코드 안에서 라벨처럼 바꿔 끼울 수 없으므로 signature에 넣는다)
+    """
+    layout = _layout(anim_ir)
+    index = {e.get("id"): i for i, e in enumerate(layout) if isinstance(e.get("id"), str)}
+    shape = {
+        "domain": (anim_ir.get("metadata") or {}).get("domain"),
+        "layout": [e.get("shape") for e in layout],
+        "actions": [
+            [a.get("animation"), _ref(index, a.get("target")), _ref(index, a.get("to")), a.get("position")]
+            for a in _actions(anim_ir)
+        ],
+    }
+    payload = json.dumps(shape, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _label_slots(anim_ir: Dict[str, Any]) -> List[Any]:
+    """signature가 같은 두 IR 사이에서 위치가 대응되는 문자열 값들 (id, 라벨, 제목, 설명, enqueue/evict item)."""
+    slots: List[Any] = [(anim_ir.get("metadata") or {}).get("title")]
+    for e in _layout(anim_ir):
+        slots += [e.get("id"), e.get("label"), e.get("text")]
+    for a in _actions(anim_ir):
+        slots += [a.get("description"), a.get("item")]
+    return slots
+
+
+def label_mapping(old_ir: Dict[str, Any], new_ir: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    저장된 IR의 문자열 → 새 IR의 문자열.
+    같은 옛 값이 서로 다른 새 값으로 가야 하면 (모호) None.
+    """
+    mapping: Dict[str, str] = {}
+    for old, new in zip(_label_slots(old_ir), _label_slots(new_ir)):
+        if not isinstance(old, str) or not isinstance(new, str) or not old:
+            continue
+        if mapping.get(old, new) != new:
+            return None
+        mapping[old] = new
+    return {k: v for k, v in mapping.items() if k != v}
+
+
+def relabel_code(code: str, mapping: Dict[str, str]) -> str:
+    """코드 안의 문자열 literal 중 값이 mapping의 key와 정확히 같은 것만 바꾼다 (f-string / 부분 문자열은 그대로)."""
+    if not mapping:
+        return code
+    tokens = []
+    for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+        if tok.type == tokenize.STRING:
+            try:
+                value = ast.literal_eval(tok.string)
+            except (ValueError, SyntaxError):
+                value = None
+            if isinstance(value, str) and value in mapping:
+                tok = tok._replace(string=repr(mapping[value]))
+        tokens.append(tok)
+    return tokenize.untokenize(tokens)
+
+
+def _signature(anim_ir: Dict[str, Any]) -> Optional[str]:
+    """signature를 만들 수 없는 모양의 IR은 store를 건너뛴다 (cache miss로 취급)."""
+    try:
+        return structural_signature(anim_ir)
+    except (TypeError, ValueError) as e:
+        print("⚠️ scene store: cannot sign anim IR:", e)
+        return None
+
+
+class SceneStore:
+    """
+    fallback codegen으로 만들어져 렌더까지 성공한 scene 코드 저장소.
+    - key: anim IR의 structural_signature
+    - 조회 시 저장된 IR과 새 IR의 라벨 차이를 코드의 문자열 literal에 반영해서 돌려준다
+    - 렌더에 성공한 코드만 add, 재사용한 코드가 렌더에 실패하면 discard
+    """
+
+    def __init__(self, path: Path = SCENE_STORE_PATH, max_entries: int = SCENE_STORE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scenes ("
+                " signature TEXT PRIMARY KEY, anim_ir TEXT NOT NULL, code TEXT NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, anim_ir: Dict[str, Any]) -> Optional[str]:
+        if not SCENE_STORE_ENABLED:
+            return None
+        signature = _signature(anim_ir)
+        if signature is None:
+            return None
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT anim_ir, code FROM scenes WHERE signature = ?", (signature,)
+            ).fetchone()
+            if row is None:
+                return None
+            mapping = label_mapping(json.loads(row[0]), anim_ir)
+            if mapping is None:
+                print("⚠️ scene store: ambiguous labels, regenerating")
+                return None
+            code = relabel_code(row[1], mapping)
+            conn.execute(
+                "UPDATE scenes SET hits = hits + 1, accessed_at = ? WHERE signature = ?",
+                (time.time(), signature),
+            )
+        except (sqlite3.Error, tokenize.TokenError, SyntaxError) as e:
+            print("⚠️ scene store read failed:", e)
+            return None
+        print(f"♻️ scene store hit ({signature[:12]}, {len(mapping)} labels replaced)")
+        return code
+
+    def add(self, anim_ir: Dict[str, Any], code: str):
+        if not SCENE_STORE_ENABLED:
+            return
+        signature = _signature(anim_ir)
+        if signature is None:
+            return
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO scenes(signature, anim_ir, code, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (signature, json.dumps(anim_ir, ensure_ascii=False), code, now, now),
+            )
+            conn.execute(
+                "DELETE FROM scenes WHERE signature IN ("
+                " SELECT signature FROM scenes ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        except sqlite3.Error as e:
+            print("⚠️ scene store write failed:", e)
+
+    def discard(self, anim_ir: Dict[str, Any]):
+        signature = _signature(anim_ir)
+        if signature is None:
+            return
+        try:
+            self._conn().execute("DELETE FROM scenes WHERE signature = ?", (signature,))
+        except sqlite3.Error as e:
+            print("⚠️ scene store delete failed:", e)
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._conn()
+        entries, hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM scenes").fetchone()
+        return {"entries": entries, "hits": hits}
+
+
+scene_store = SceneStore()
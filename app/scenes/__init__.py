@@ -0,0 +1,27 @@
+# app/scenes/__init__.py
+# IR을 생성자 인자로 받는 scene 클래스들 (manim import가 필요하므로 render worker 쪽에서만 import).
+# API 프로세스는 "app.scenes.sorting:SortingScene" 같은 경로 문자열만 render_pool.render_scene_class에 넘긴다.
+from app.scenes.base import ParamScene, load_ir
+from app.scenes.sorting import SortingScene
+from app.scenes.cnn_param import CNNParamScene
+from app.scenes.seq_attention import SeqAttentionScene
+from app.scenes.ir_scene import IRScene
+from app.layout_utils import glyph_atlas
+
+SCENE_CLASSES = [SortingScene, CNNParamScene, SeqAttentionScene, IRScene]
+
+
+def prewarm_scenes() -> int:
+    """scene마다 고정 라벨 + 숫자 glyph atlas를 미리 만든다 (asset_cache.prewarm에서 호출). 반환값은 라벨 수."""
+    return sum(cls.prewarm() for cls in SCENE_CLASSES) + glyph_atlas.warm()
+
+__all__ = [
+    "ParamScene",
+    "load_ir",
+    "SortingScene",
+    "CNNParamScene",
+    "SeqAttentionScene",
+    "IRScene",
+    "SCENE_CLASSES",
+    "prewarm_scenes",
+]
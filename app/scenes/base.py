@@ -0,0 +1,43 @@
+# app/scenes/base.py
+import json
+from typing import Any, Dict, List, Tuple
+
+from manim import Scene
+
+from app.layout_utils import cached_text
+
+DIGITS = [str(d) for d in range(10)]
+
+
+class ParamScene(Scene):
+    """
+    IR을 생성자 인자로 받는 Scene. construct()는 self.ir만 읽는다.
+    scene 코드는 패키지 모듈이라 한 번만 byte-compile되고, 요청마다 바뀌는 건 IR(dict)뿐이다.
+    """
+
+    # 첫 요청 전에 만들어 둘 고정 라벨 (text, font_size, color). construct()의 cached_text 호출과 같은 값이어야 hit
+    PREWARM_TEXTS: List[Tuple[str, float, Any]] = []
+
+    def __init__(self, ir: Dict[str, Any], **kwargs):
+        self.ir = ir
+        super().__init__(**kwargs)
+
+    @classmethod
+    def prewarm(cls) -> int:
+        for text, font_size, color in cls.PREWARM_TEXTS:
+            cached_text(text, font_size=font_size, color=color)
+        return len(cls.PREWARM_TEXTS)
+
+    @classmethod
+    def prefetch_labels(cls, ir: Dict[str, Any]) -> Tuple[List[Tuple[str, float, Any]], List[str]]:
+        """
+        construct()가 이 IR로 만들 라벨을 미리 계산: (Text (text, font_size, color) 리스트, MathTex 문자열 리스트).
+        render_pool이 렌더 전에 SVG를 한꺼번에 만들어 두는 데 쓴다. 기본은 없음.
+        """
+        return [], []
+
+
+def load_ir(path: str) -> Dict[str, Any]:
+    """manim CLI 경로용 side-channel: render_pool이 써 둔 IR JSON 파일을 읽는다."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
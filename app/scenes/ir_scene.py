@@ -0,0 +1,84 @@
+# app/scenes/ir_scene.py
+from manim import *
+
+from app.layout_utils import cached_text
+from app.scenes.base import ParamScene, DIGITS
+
+
+class IRScene(ParamScene):
+    """ir = component/event IR (components: arr<i>, events: compare/swap + step). app.render.expand_bubble_trace 결과."""
+
+    PREWARM_TEXTS = [(d, 36, BLACK) for d in DIGITS]
+
+    @classmethod
+    def prefetch_labels(cls, ir):
+        return [(str(c.get("label", "?")), 36, BLACK) for c in ir.get("components", [])], []
+
+    def construct(self):
+        print("🎬 IR loaded, starting bubble sort animation...")
+        IR = self.ir
+
+        # --- Step 1: 초기 원 배열 그리기 ---
+        circles = []
+        x_start = -3
+        for i, comp in enumerate(IR.get("components", [])):
+            value = str(comp.get("label", "?"))
+            c = Circle(radius=0.5, color=YELLOW, fill_opacity=0.6).shift(RIGHT * (x_start + i * 1.4))
+            label = cached_text(value, font_size=36, color=BLACK).move_to(c.get_center())
+            group = VGroup(c, label)
+            self.add(group)
+            circles.append(group)
+
+        self.wait(0.8)
+
+        # --- Step 2: 이벤트 재생 (compare + swap) ---
+        current_step = 1
+        for e in IR.get("events", []):
+            op = e.get("op")
+            i = int(e["from"].replace("arr", ""))
+            j = int(e["to"].replace("arr", ""))
+
+            if op == "compare":
+                # 비교 시 살짝 들썩
+                self.play(
+                    circles[i].animate.shift(UP*0.25),
+                    circles[j].animate.shift(UP*0.25),
+                    run_time=0.2
+                )
+                self.play(
+                    circles[i].animate.shift(DOWN*0.25),
+                    circles[j].animate.shift(DOWN*0.25),
+                    run_time=0.2
+                )
+
+            elif op == "swap":
+                # swap 시 실제 위치 교환 + 색 변화
+                pos_i = circles[i].get_center()
+                pos_j = circles[j].get_center()
+                self.play(
+                    circles[i][0].animate.set_color(ORANGE),
+                    circles[j][0].animate.set_color(ORANGE),
+                    run_time=0.2
+                )
+                self.play(
+                    circles[i].animate.move_to(pos_j),
+                    circles[j].animate.move_to(pos_i),
+                    run_time=0.6
+                )
+                circles[i], circles[j] = circles[j], circles[i]
+                self.play(
+                    circles[i][0].animate.set_color(YELLOW),
+                    circles[j][0].animate.set_color(YELLOW),
+                    run_time=0.2
+                )
+
+            # 패스 간 잠시 멈춤
+            step_num = e.get("step", 0)
+            if step_num > current_step:
+                self.wait(0.3)
+                current_step = step_num
+
+        # --- Step 3: 정렬 완료 표시 ---
+        self.wait(0.5)
+        self.play(*[c[0].animate.set_color(GREEN) for c in circles], run_time=1.0)
+        self.wait(1.0)
@@ -1,4 +1,5 @@
 # app/schema.py
+import copy
 from jsonschema import Draft7Validator
 from typing import Dict, Any, List
 
@@ -41,7 +42,13 @@ JSON_IR_SCHEMA: Dict[str, Any] = {
                 }
             }
         },
-        "metadata": {"type": "object"}
+        "metadata": {
+            "type": "object",
+            "properties": {
+                "view": {"type": "string"},
+                "domain": {"type": "string"},
+            },
+        }
     },
     "additionalProperties": True
 }
@@ -128,6 +135,11 @@ ATTENTION_IR_SCHEMA: Dict[str, Any] = {
             },
             "additionalProperties": False,
         },
+        "metadata": {
+            "type": "object",
+            "properties": {"degraded": {"type": "boolean"}},
+            "additionalProperties": False,
+        },
     },
     "additionalProperties": False,     
 }
@@ -180,3 +192,196 @@ def validate_attention_ir(doc: Dict[str, Any]) -> List[str]:
             errors.append("next_token.candidates and probs must have the same length")
 
     return errors
+
+
+# === sorting_trace (정렬 trace) IR 스키마 ===
+
+SORTING_TRACE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["algorithm", "input", "trace"],
+    "properties": {
+        "algorithm": {"type": "string"},
+        "description": {"type": "string"},
+        "input": {
+            "type": "object",
+            "required": ["array"],
+            "properties": {
+                "array": {"type": "array", "items": {"type": "integer"}, "minItems": 1},
+            },
+        },
+        "trace": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["step", "compare", "swap", "array"],
+                "properties": {
+                    "step": {"type": "integer"},
+                    "compare": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "minItems": 2,
+                        "maxItems": 2,
+                    },
+                    "swap": {"type": "boolean"},
+                    "array": {"type": "array", "items": {"type": "integer"}},
+                    "min_index": {"type": "integer"},
+                },
+            },
+        },
+        "metadata": {
+            "type": "object",
+            "properties": {
+                "domain": {"type": "string"},
+                "order": {"type": "string", "enum": ["ascending", "descending"]},
+            },
+        },
+    },
+}
+
+SORTING_TRACE_VALIDATOR = Draft7Validator(SORTING_TRACE_SCHEMA)
+
+
+def validate_sorting_trace_ir(doc: Dict[str, Any]) -> List[str]:
+    errors = [f"{e.message} at {list(e.absolute_path)}" for e in SORTING_TRACE_VALIDATOR.iter_errors(doc)]
+    if errors:
+        return errors
+
+    # 모든 step의 array는 입력 배열의 순열이어야 하고, compare 인덱스는 범위 안이어야 함
+    base = sorted(doc["input"]["array"])
+    n = len(base)
+    for i, step in enumerate(doc["trace"]):
+        if sorted(step["array"]) != base:
+            errors.append(f"trace[{i}].array is not a permutation of input.array")
+        if any(not 0 <= idx < n for idx in step["compare"]):
+            errors.append(f"trace[{i}].compare index out of range")
+    return errors
+
+
+# === cnn_param (CNN 파라미터) IR 스키마 ===
+
+CNN_PARAM_IR_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["ir"],
+    "properties": {
+        "ir": {
+            "type": "object",
+            "required": ["params"],
+            "properties": {
+                "metadata": {
+                    "type": "object",
+                    "properties": {"domain": {"type": "string"}},
+                },
+                "params": {
+                    "type": "object",
+                    "required": ["input_size", "kernel_size"],
+                    "properties": {
+                        "input_size": {"type": "integer", "minimum": 1},
+                        "kernel_size": {"type": "integer", "minimum": 1},
+                        "stride": {"type": "integer", "minimum": 1},
+                        "padding": {"type": "integer", "minimum": 0},
+                        "seed": {"type": "integer"},
+                    },
+                },
+            },
+        },
+        "basename": {"type": "string"},
+        "out_format": {"type": "string"},
+    },
+}
+
+CNN_PARAM_IR_VALIDATOR = Draft7Validator(CNN_PARAM_IR_SCHEMA)
+
+
+def validate_cnn_param_ir(doc: Dict[str, Any]) -> List[str]:
+    errors = [f"{e.message} at {list(e.absolute_path)}" for e in CNN_PARAM_IR_VALIDATOR.iter_errors(doc)]
+    if errors:
+        return errors
+
+    p = doc["ir"]["params"]
+    if p["kernel_size"] > p["input_size"] + 2 * p.get("padding", 0):
+        errors.append("kernel_size must not exceed input_size + 2 * padding")
+    return errors
+
+
+# === pseudocode / anim IR (generic fallback 경로) 최소 구조 검사 ===
+
+def validate_pseudocode_ir(doc: Dict[str, Any]) -> List[str]:
+    errors: List[str] = []
+    ops = doc.get("operations")
+    if not isinstance(ops, list) or not ops:
+        errors.append("operations must be a non-empty list")
+    elif any(not isinstance(op, dict) or "action" not in op for op in ops):
+        errors.append("every operation needs an action")
+    if not isinstance(doc.get("entities", []), list):
+        errors.append("entities must be a list")
+    return errors
+
+
+def validate_anim_ir(doc: Dict[str, Any]) -> List[str]:
+    errors: List[str] = []
+    for key in ("layout", "actions"):
+        if not isinstance(doc.get(key), list) or not doc.get(key):
+            errors.append(f"{key} must be a non-empty list")
+    return errors
+
+
+# === OpenAI structured output (strict json_schema) ===
+
+def to_strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    위의 검증용 스키마를 strict structured output 스키마로 변환.
+    - object: additionalProperties=false, 모든 property를 required로 (원래 optional이면 null 허용)
+    - oneOf → anyOf, const → enum
+    - 내용이 정의되지 않은 자유형 필드(style, data 등)는 strict 모드에서 표현할 수 없으므로 뺀다
+    """
+    node = copy.deepcopy(schema)
+    if "const" in node:
+        node["enum"] = [node.pop("const")]
+    if "oneOf" in node:
+        node["anyOf"] = node.pop("oneOf")
+    if "anyOf" in node:
+        node["anyOf"] = [to_strict_schema(n) for n in node["anyOf"]]
+    if isinstance(node.get("items"), dict):
+        node["items"] = to_strict_schema(node["items"])
+    if node.get("type") == "object":
+        required = set(node.get("required", []))
+        props = {
+            k: v for k, v in node.get("properties", {}).items()
+            if v and not (v.get("type") == "object" and not v.get("properties"))
+        }
+        node["properties"] = {
+            k: to_strict_schema(v) if k in required else {"anyOf": [to_strict_schema(v), {"type": "null"}]}
+            for k, v in props.items()
+        }
+        node["required"] = list(props)
+        node["additionalProperties"] = False
+    return node
+
+
+def json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """chat.completions response_format 인자. 모델이 스키마 밖의 모양을 낼 수 없게 한다."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": to_strict_schema(schema)},
+    }
+
+
+def strip_nulls(doc: Any) -> Any:
+    """strict 출력에서 optional 필드 자리에 들어온 null을 제거 (원래 스키마 모양으로 되돌림)."""
+    if isinstance(doc, dict):
+        return {k: strip_nulls(v) for k, v in doc.items() if v is not None}
+    if isinstance(doc, list):
+        return [strip_nulls(v) for v in doc]
+    return doc
+
+
+ATTENTION_SENTENCE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["raw_text"],
+    "properties": {"raw_text": {"type": "string"}},
+}
+
+ATTENTION_IR_FORMAT = json_schema_format("seq_attention_ir", ATTENTION_IR_SCHEMA)
+ATTENTION_SENTENCE_FORMAT = json_schema_format("attention_sentence", ATTENTION_SENTENCE_SCHEMA)
+SORTING_TRACE_FORMAT = json_schema_format("sorting_trace", SORTING_TRACE_SCHEMA)
+CNN_PARAM_IR_FORMAT = json_schema_format("cnn_param_ir", CNN_PARAM_IR_SCHEMA)
@@ -0,0 +1,240 @@
+# app/semantic_cache.py
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.cnn_params import stated_values
+from app.sorting_trace import GENERIC_SORT_WORDS
+
+# --- 기본 설정 (환경변수로 조정 가능) ---
+SEMANTIC_CACHE_PATH = Path(os.getenv("SEMANTIC_CACHE_PATH", "cache/semantic_cache.sqlite3"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.82"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") != "0"
+
+VECTOR_DIM = 2048
+NGRAM_RANGE = (2, 4)
+
+# 한국어/영어 표현을 같은 canonical 용어로 맞춘다 (긴 표현부터 치환)
+SYNONYMS = [
+    ("버블 정렬", "bubble sort"), ("버블정렬", "bubble sort"),
+    ("선택 정렬", "selection sort"), ("선택정렬", "selection sort"),
+    ("삽입 정렬", "insertion sort"), ("삽입정렬", "insertion sort"),
+    ("병합 정렬", "merge sort"), ("병합정렬", "merge sort"), ("합병 정렬", "merge sort"),
+    ("퀵 정렬", "quick sort"), ("퀵정렬", "quick sort"), ("quicksort", "quick sort"),
+    ("힙 정렬", "heap sort"), ("힙정렬", "heap sort"), ("heapsort", "heap sort"),
+    ("오름차순", "ascending"), ("내림차순", "descending"), ("작은 순", "ascending"), ("큰 순", "descending"),
+    ("smallest to largest", "ascending"), ("lowest to highest", "ascending"), ("low to high", "ascending"),
+    ("increasing", "ascending"),
+    ("largest to smallest", "descending"), ("biggest to smallest", "descending"),
+    ("highest to lowest", "descending"), ("high to low", "descending"), ("biggest first", "descending"),
+    ("largest first", "descending"), ("decreasing", "descending"), ("reverse order", "descending"),
+    ("reversed", "descending"), ("reverse", "descending"),
+    ("정렬", "sort"), ("sorting", "sort"),
+    ("합성곱", "convolution"), ("컨볼루션", "convolution"),
+    ("커널", "kernel"), ("필터", "kernel"), ("filter", "kernel"),
+    ("스트라이드", "stride"), ("패딩", "padding"), ("행렬", "matrix"),
+    ("어텐션", "attention"), ("셀프", "self"), ("트랜스포머", "transformer"),
+    ("다음 토큰", "next token"), ("배열", "array"),
+]
+
+# 의미 없는 요청 문구 (비교 전에 제거)
+FILLERS = [
+    "step by step", "step-by-step", "단계별로", "단계별", "시각화해줘", "시각화 해줘", "시각화",
+    "보여줘", "보여 줘", "해줘", "과정을", "과정", "please", "show me", "visualize", "visualise",
+    "how", "the", "using", "with",
+]
+
+# 영문/숫자 바로 뒤에 붙은 조사 ("bubble sort로", "[5,1,4,2]을")
+PARTICLE_RE = re.compile(r"(?<=[a-z0-9\]\)])(으로|로|을|를|의|에서|에|이|가)(?![가-힣])")
+
+# 결과를 결정하는 핵심 용어: 이 집합이 다르면 유사해도 재사용하지 않는다
+KEY_TERMS = [
+    "bubble sort", "selection sort", "insertion sort", "merge sort", "quick sort", "heap sort",
+    "ascending", "descending", "kernel", "stride", "padding", "attention", "next token",
+]
+
+# KEY_TERMS에 없는 정렬 이름도 ("shell sort", "counting sort", "계수 sort") 핵심 용어로.
+# 한국어는 조사로 끝나는 단어("숫자들을 정렬")는 이름이 아니므로 제외
+SORT_NAME_RE = re.compile(r"\b([a-z]+?|[가-힣]+(?<![을를이가의로에]))[\s-]*sort\b")
+
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    for src, dst in SYNONYMS:
+        text = text.replace(src, dst)
+    text = PARTICLE_RE.sub(" ", text)
+    for f in FILLERS:
+        text = re.sub(rf"(?<![\w]){re.escape(f)}(?![\w])", " ", text)
+    text = NUMBER_RE.sub("#", text)
+    text = re.sub(r"[^\w#\[\]]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def extract_numbers(text: str) -> List[str]:
+    """요청에 등장하는 수치를 순서대로 (3 과 3.0 은 같은 값으로)."""
+    out = []
+    for n in NUMBER_RE.findall(unicodedata.normalize("NFKC", text)):
+        v = float(n)
+        out.append(str(int(v)) if v.is_integer() else repr(v))
+    return out
+
+
+def extract_key_terms(text: str) -> List[str]:
+    """
+    KEY_TERMS + 정렬 이름 + "stride=2" 같은 (파라미터, 값) 쌍.
+    숫자 목록만 비교하면 "stride 2, padding 1"과 "stride 1, padding 2"가 같아지므로 값을 이름에 묶는다.
+    """
+    norm = unicodedata.normalize("NFKC", text).lower()
+    for src, dst in SYNONYMS:
+        norm = norm.replace(src, dst)
+    terms = {t for t in KEY_TERMS if t in norm}
+    for m in SORT_NAME_RE.finditer(PARTICLE_RE.sub(" ", norm)):
+        if m.group(1) not in GENERIC_SORT_WORDS and m.group(1) not in KEY_TERMS:
+            terms.add(f"{m.group(1)} sort")
+    for field, vals in stated_values(unicodedata.normalize("NFKC", text)).items():
+        terms.update(f"{field}={v}" for v in vals)
+    return sorted(terms)
+
+
+def vectorize(norm_text: str) -> np.ndarray:
+    """문자 n-gram을 hashing trick으로 고정 차원에 누적한 L2 정규화 벡터."""
+    vec = np.zeros(VECTOR_DIM, dtype=np.float32)
+    padded = f" {norm_text} "
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(padded) - n + 1):
+            vec[zlib.crc32(padded[i:i + n].encode("utf-8")) % VECTOR_DIM] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class SemanticCache:
+    """
+    과거 요청 → 검증을 통과한 IR(sorting trace / CNN params / attention IR) 인덱스.
+    - 재사용 조건: 코사인 유사도 ≥ threshold AND 수치 목록 동일 AND 핵심 용어 동일
+      AND anchors(예: attention 입력 문장)가 새 요청에 그대로 포함
+    - 저장은 SQLite (worker 간 공유), 검색은 메모리의 NumPy 행렬로
+    """
+
+    def __init__(self, path: Path = SEMANTIC_CACHE_PATH, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_id = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._matrix = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, norm_text TEXT NOT NULL,"
+                " numbers TEXT NOT NULL, key_terms TEXT NOT NULL, anchors TEXT NOT NULL,"
+                " payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _refresh(self, conn: sqlite3.Connection):
+        """다른 worker가 추가/삭제한 항목을 메모리 인덱스에 반영 (lock 잡은 상태에서 호출)."""
+        min_id = conn.execute("SELECT MIN(id) FROM entries").fetchone()[0]
+        if self._rows and (min_id is None or min_id > self._rows[0]["id"]):
+            # eviction이 일어났으면 전체 재적재
+            self._rows, self._last_id = [], 0
+            self._matrix = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+
+        new = conn.execute(
+            "SELECT id, norm_text, numbers, key_terms, anchors, payload FROM entries WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ).fetchall()
+        if not new:
+            return
+        rows = [
+            {
+                "id": r[0],
+                "numbers": json.loads(r[2]),
+                "key_terms": json.loads(r[3]),
+                "anchors": json.loads(r[4]),
+                "payload": json.loads(r[5]),
+            }
+            for r in new
+        ]
+        vecs = np.stack([vectorize(r[1]) for r in new])
+        self._rows.extend(rows)
+        self._matrix = np.vstack([self._matrix, vecs])
+        self._last_id = rows[-1]["id"]
+
+    def lookup(self, user_text: str) -> Optional[Dict[str, Any]]:
+        if not SEMANTIC_CACHE_ENABLED:
+            return None
+        numbers = extract_numbers(user_text)
+        key_terms = extract_key_terms(user_text)
+        lowered = user_text.lower()
+        query = vectorize(normalize_text(user_text))
+
+        try:
+            with self._lock:
+                self._refresh(self._conn())
+                if not self._rows:
+                    return None
+                sims = self._matrix @ query
+                # 유사도 높은 순으로 보면서 조건을 모두 만족하는 첫 항목
+                for idx in np.argsort(-sims):
+                    if sims[idx] < self.threshold:
+                        break
+                    row = self._rows[idx]
+                    if row["numbers"] != numbers or row["key_terms"] != key_terms:
+                        continue
+                    if not all(a.lower() in lowered for a in row["anchors"]):
+                        continue
+                    print(f"♻️ semantic cache hit (sim={sims[idx]:.3f})")
+                    return row["payload"]
+        except sqlite3.Error as e:
+            print("⚠️ semantic cache read failed:", e)
+        return None
+
+    def add(self, user_text: str, payload: Dict[str, Any], anchors: Optional[List[str]] = None):
+        if not SEMANTIC_CACHE_ENABLED:
+            return
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT INTO entries(norm_text, numbers, key_terms, anchors, payload, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_text(user_text),
+                    json.dumps(extract_numbers(user_text)),
+                    json.dumps(extract_key_terms(user_text)),
+                    json.dumps(anchors or [], ensure_ascii=False),
+                    json.dumps(payload, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+            conn.execute(
+                "DELETE FROM entries WHERE id IN ("
+                " SELECT id FROM entries ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        except sqlite3.Error as e:
+            print("⚠️ semantic cache write failed:", e)
+
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,322 @@
+# app/sorting_trace.py
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# 알고리즘 이름 인식 (한국어/영어) — "quickly", "selection of numbers" 같은 낱말에 걸리지 않게
+# "<이름> sort" / "<이름>sort" / "<이름> 정렬" 형태만 받는다
+ALGORITHM_PATTERNS: List[Tuple[str, str]] = [
+    ("bubble_sort", r"\bbubble[\s-]*sort|버블\s*정렬"),
+    ("selection_sort", r"\bselection[\s-]*sort|선택\s*정렬"),
+    ("insertion_sort", r"\binsertion[\s-]*sort|삽입\s*정렬"),
+    ("merge_sort", r"\bmerge[\s-]*sort|병합\s*정렬|합병\s*정렬"),
+    ("quick_sort", r"\bquick[\s-]*sort|퀵\s*정렬"),
+    ("heap_sort", r"\bheap[\s-]*sort|힙\s*정렬"),
+]
+DEFAULT_ALGORITHM = "bubble_sort"
+# "<이름> sort" / "<이름> 정렬" 형태의 정렬 이름 (지원하지 않는 shell/counting/radix sort 등을 알아보기 위해)
+NAMED_SORT_RE = re.compile(
+    r"\b([a-z]+)[\s-]*sort\b|(셸|쉘|계수|기수|버킷|팀|칵테일|셰이커|카운팅|래딕스)\s*정렬",
+    re.IGNORECASE,
+)
+# "please sort", "can we sort", "let's sort" 처럼 sort 앞에 와도 알고리즘 이름이 아닌 단어
+# ("let's"는 아포스트로피에서 끊겨 "s"만 잡힌다)
+GENERIC_SORT_WORDS = {
+    "a", "an", "the", "to", "and", "or", "then", "please", "pls", "can", "could", "would", "will",
+    "should", "must", "you", "me", "it", "i", "we", "us", "they", "them", "let", "lets", "s",
+    "this", "that", "these", "those", "array", "list", "numbers", "values", "elements", "items",
+    "show", "visualize", "animate", "do", "re", "just", "also", "now", "first", "again", "how",
+    "quickly", "simply", "correctly", "properly", "step", "by",
+}
+EXAMPLE_ARRAY = [5, 1, 4, 2, 8]   # DOMAIN_PROMPTS["sorting_trace"] 예시와 같은 배열
+
+# semantic_cache.SYNONYMS 에서 descending으로 묶는 표현과 맞춘다
+DESCENDING_RE = re.compile(
+    r"descending|decreasing|reverse|(?:largest|biggest) (?:to smallest|first)|high(?:est)? to low(?:est)?"
+    r"|내림차순|큰\s*순",
+    re.IGNORECASE,
+)
+BRACKET_ARRAY_RE = re.compile(r"[\[(]\s*(-?\d+(?:\s*,\s*-?\d+)+)\s*[\])]")
+PLAIN_ARRAY_RE = re.compile(r"(?<![\w.])(-?\d+(?:\s*,\s*-?\d+){2,})(?![\w.])")
+
+
+# ---------- 입력 추출 ----------
+def extract_array(text: str) -> Optional[List[int]]:
+    """'[5, 1, 4, 2]' 우선, 없으면 '5, 1, 4, 2' 처럼 쉼표로 나열된 정수 3개 이상."""
+    m = BRACKET_ARRAY_RE.search(text) or PLAIN_ARRAY_RE.search(text)
+    if not m:
+        return None
+    return [int(x) for x in re.split(r"\s*,\s*", m.group(1).strip())]
+
+
+def detect_algorithm(text: str) -> Optional[str]:
+    """
+    가장 먼저 언급된 정렬 알고리즘. 언급이 없으면 bubble sort.
+    가장 먼저 언급된 이름이 지원하지 않는 정렬(shell sort, 계수 정렬 등)이면 None.
+    """
+    found: List[Tuple[int, Optional[str]]] = []
+    for name, pattern in ALGORITHM_PATTERNS:
+        m = re.search(pattern, text, re.IGNORECASE)
+        if m:
+            found.append((m.start(), name))
+    for m in NAMED_SORT_RE.finditer(text):
+        word = (m.group(1) or m.group(2)).lower()
+        if word in GENERIC_SORT_WORDS:
+            continue
+        if any(re.search(pattern, m.group(0), re.IGNORECASE) for _, pattern in ALGORITHM_PATTERNS):
+            continue
+        found.append((m.start(), None))
+    return min(found, key=lambda x: x[0])[1] if found else DEFAULT_ALGORITHM
+
+
+# ---------- 시뮬레이터 ----------
+class _Tracer:
+    """배열 상태를 들고 다니면서 {step, compare, swap, array, min_index} step을 기록."""
+
+    def __init__(self, arr: List[int], descending: bool):
+        self.a = list(arr)
+        self.descending = descending
+        self.steps: List[Dict[str, Any]] = []
+
+    def after(self, x: int, y: int) -> bool:
+        """x가 y보다 뒤에 와야 하면 True (오름차순이면 x > y)."""
+        return x < y if self.descending else x > y
+
+    def record(self, i: int, j: int, swap: bool, min_index: Optional[int] = None):
+        if swap:
+            self.a[i], self.a[j] = self.a[j], self.a[i]
+        step = {"step": len(self.steps) + 1, "compare": [i, j], "swap": swap, "array": list(self.a)}
+        if min_index is not None:
+            step["min_index"] = min_index
+        self.steps.append(step)
+
+
+def _bubble(t: _Tracer):
+    n = len(t.a)
+    for i in range(n):
+        for j in range(n - i - 1):
+            t.record(j, j + 1, t.after(t.a[j], t.a[j + 1]))
+
+
+def _selection(t: _Tracer):
+    n = len(t.a)
+    for i in range(n - 1):
+        m = i
+        for j in range(i + 1, n):
+            prev = m
+            if t.after(t.a[m], t.a[j]):
+                m = j
+            t.record(prev, j, False, min_index=m)
+        if m != i:
+            t.record(i, m, True, min_index=i)
+
+
+def _insertion(t: _Tracer):
+    for i in range(1, len(t.a)):
+        j = i
+        while j > 0:
+            swap = t.after(t.a[j - 1], t.a[j])
+            t.record(j - 1, j, swap)
+            if not swap:
+                break
+            j -= 1
+
+
+def _merge(t: _Tracer, lo: int = 0, hi: Optional[int] = None):
+    """in-place merge: 오른쪽 원소가 앞으로 가야 하면 인접 swap으로 끌어온다."""
+    if hi is None:
+        hi = len(t.a)
+    if hi - lo < 2:
+        return
+    mid = (lo + hi) // 2
+    _merge(t, lo, mid)
+    _merge(t, mid, hi)
+
+    i, j = lo, mid
+    while i < j < hi:
+        move = t.after(t.a[i], t.a[j])
+        t.record(i, j, False)
+        if move:
+            for k in range(j, i, -1):
+                t.record(k - 1, k, True)
+            j += 1
+        i += 1
+
+
+def _quick(t: _Tracer, lo: int = 0, hi: Optional[int] = None):
+    """Lomuto partition (pivot = 구간의 마지막 원소)."""
+    if hi is None:
+        hi = len(t.a) - 1
+    if lo >= hi:
+        return
+    i = lo - 1
+    for j in range(lo, hi):
+        go_left = not t.after(t.a[j], t.a[hi])
+        t.record(j, hi, False)
+        if go_left:
+            i += 1
+            if i != j:
+                t.record(i, j, True)
+    if i + 1 != hi:
+        t.record(i + 1, hi, True)
+    _quick(t, lo, i)
+    _quick(t, i + 2, hi)
+
+
+def _heap(t: _Tracer):
+    n = len(t.a)
+
+    def sift_down(root: int, end: int):
+        while True:
+            child = 2 * root + 1
+            if child >= end:
+                return
+            if child + 1 < end:
+                t.record(child, child + 1, False)
+                if t.after(t.a[child + 1], t.a[child]):
+                    child += 1
+            t.record(root, child, False)
+            if not t.after(t.a[child], t.a[root]):
+                return
+            t.record(root, child, True)
+            root = child
+
+    for start in range(n // 2 - 1, -1, -1):
+        sift_down(start, n)
+    for end in range(n - 1, 0, -1):
+        t.record(0, end, True)
+        sift_down(0, end)
+
+
+SIMULATORS = {
+    "bubble_sort": _bubble,
+    "selection_sort": _selection,
+    "insertion_sort": _insertion,
+    "merge_sort": _merge,
+    "quick_sort": _quick,
+    "heap_sort": _heap,
+}
+
+
+def simulate_sort(algorithm: str, arr: List[int], descending: bool = False) -> List[Dict[str, Any]]:
+    """알고리즘을 실제로 돌려서 SortingScene이 읽는 step 리스트를 만든다."""
+    if algorithm not in SIMULATORS:
+        raise ValueError(f"Unknown sorting algorithm: {algorithm}")
+    t = _Tracer(arr, descending)
+    SIMULATORS[algorithm](t)
+    return t.steps
+
+
+# ---------- replay ----------
+def replay_steps(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    SortingScene이 실제로 애니메이션할 step들.
+    같은 (compare, swap, array)가 연달아 나오면 하나만 남긴다 — array까지 같아야 중복이다.
+    (heap sort처럼 같은 쌍을 연달아 swap하는 trace는 array가 달라지므로 그대로 남는다)
+    """
+    cleaned: List[Dict[str, Any]] = []
+    prev = None
+    for s in steps:
+        if "compare" not in s:
+            continue
+        i, j = s["compare"]
+        key = (i, j, bool(s.get("swap", False)), tuple(s.get("array") or ()))
+        if key == prev:
+            continue
+        cleaned.append(s)
+        prev = key
+    return cleaned
+
+
+def replay_array(trace_ir: Dict[str, Any]) -> List[int]:
+    """input.array에 replay_steps의 swap만 순서대로 적용한 결과 (= 씬 마지막 화면의 배열)."""
+    a = list(trace_ir["input"]["array"])
+    for s in replay_steps(trace_ir.get("trace", [])):
+        if s.get("swap"):
+            i, j = s["compare"]
+            a[i], a[j] = a[j], a[i]
+    return a
+
+
+def replay_errors(trace_ir: Dict[str, Any]) -> List[str]:
+    """씬에서 replay한 결과가 정렬된 배열과 다르면 에러 문자열."""
+    descending = (trace_ir.get("metadata") or {}).get("order") == "descending"
+    expected = sorted(trace_ir["input"]["array"], reverse=descending)
+    got = replay_array(trace_ir)
+    if got != expected:
+        return [f"{trace_ir.get('algorithm')} replays to {got}, expected {expected}"]
+    return []
+
+
+def build_sorting_trace(algorithm: str, arr: List[int], descending: bool = False) -> Dict[str, Any]:
+    return {
+        "algorithm": algorithm,
+        "input": {"array": list(arr)},
+        "trace": simulate_sort(algorithm, arr, descending),
+        "metadata": {"domain": "sorting", "order": "descending" if descending else "ascending"},
+    }
+
+
+def local_sorting_trace(user_text: str) -> Optional[Dict[str, Any]]:
+    """요청에서 배열을 찾으면 LLM 없이 trace 생성. 배열이 없거나 지원하지 않는 알고리즘이면 None."""
+    arr = extract_array(user_text)
+    algorithm = detect_algorithm(user_text)
+    if arr is None or algorithm is None:
+        return None
+    trace = build_sorting_trace(
+        algorithm,
+        arr,
+        descending=bool(DESCENDING_RE.search(user_text)),
+    )
+    errors = replay_errors(trace)
+    if errors:
+        # 시뮬레이터 버그로 씬이 엉뚱한 배열에서 "Sorted!"를 띄우느니 LLM 경로로
+        print(f"⚠️ local sorting trace does not replay: {errors[0]}")
+        return None
+    return trace
+
+
+def example_sorting_trace(user_text: str) -> Optional[Dict[str, Any]]:
+    """
+    배열이 없는 요청을 LLM 없이 처리해야 할 때: 알고리즘/정렬 방향만 읽고 예시 배열로 trace.
+    지원하지 않는 알고리즘이면 None (bubble sort로 바꿔치기하지 않는다).
+    """
+    algorithm = detect_algorithm(user_text)
+    if algorithm is None:
+        return None
+    return build_sorting_trace(
+        algorithm,
+        EXAMPLE_ARRAY,
+        descending=bool(DESCENDING_RE.search(user_text)),
+    )
+
+
+# ---------- trace → component/event IR ----------
+EVENT_DT = 0.2   # event 사이 시간 간격
+
+
+def trace_to_json_ir(trace_ir: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    sorting trace → JSON_IR_SCHEMA IR (예전 llm.py stage 2 프롬프트가 LLM에 시키던 규칙 그대로).
+    - 입력 원소마다 component "arr<i>" (label = 처음 값)
+    - step마다 compare event, swap이면 이어서 swap event (t는 0.0부터 EVENT_DT씩 증가)
+    """
+    arr = trace_ir["input"]["array"]
+    components = [{"id": f"arr{i}", "label": str(v)} for i, v in enumerate(arr)]
+    events: List[Dict[str, Any]] = []
+
+    def emit(op: str, i: int, j: int):
+        events.append({"t": round(EVENT_DT * len(events), 2), "op": op, "from": f"arr{i}", "to": f"arr{j}"})
+
+    for step in trace_ir.get("trace", []):
+        i, j = step["compare"]
+        if not (0 <= i < len(arr) and 0 <= j < len(arr)):
+            raise ValueError(f"step {step.get('step')} compares out of range: {[i, j]}")
+        emit("compare", i, j)
+        if step.get("swap"):
+            emit("swap", i, j)
+
+    return {
+        "components": components,
+        "events": events,
+        "metadata": {"view": "flow", "domain": (trace_ir.get("metadata") or {}).get("domain", "sorting")},
+    }
@@ -0,0 +1,81 @@
+# app/stage_graph.py
+import time
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+# 현재 task가 어떤 stage들을 거쳐 실행 중인지 (cycle 검출용, task마다 context가 복사된다)
+_CHAIN: ContextVar[Tuple[str, ...]] = ContextVar("stage_chain", default=())
+
+
+class StageGraph:
+    """
+    이름 붙은 async stage들의 lazy 의존 그래프.
+    - stage 함수는 graph를 인자로 받아 필요한 upstream을 await g.get(...)으로 직접 요청한다
+      → 분기에 따라 실제로 필요한 stage만 실행된다 (조건부 의존성)
+    - 각 stage는 요청당 한 번만 실행되는 asyncio Task → 서로 독립인 stage는 동시에 진행된다
+    - start()로 결과가 필요해지기 전에 미리(투기적으로) 시작하고, 필요 없어지면 cancel()
+    """
+
+    def __init__(self, **inputs: Any):
+        self._values: Dict[str, Any] = dict(inputs)
+        self._stages: Dict[str, Callable[["StageGraph"], Awaitable[Any]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.timings: Dict[str, float] = {}
+        self.cancelled: List[str] = []
+
+    def add(self, name: str, fn: Callable[["StageGraph"], Awaitable[Any]]) -> "StageGraph":
+        if name in self._stages or name in self._values:
+            raise ValueError(f"stage already defined: {name}")
+        self._stages[name] = fn
+        return self
+
+    def start(self, name: str) -> None:
+        """stage를 백그라운드 Task로 시작만 한다 (이미 시작/완료됐으면 아무것도 안 함)."""
+        if name in self._values or name in self._tasks:
+            return
+        if name not in self._stages:
+            raise KeyError(f"unknown stage: {name}")
+        self._tasks[name] = asyncio.ensure_future(self._run(name))
+
+    async def get(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        chain = _CHAIN.get()
+        if name in chain:
+            raise RuntimeError(f"stage cycle: {' -> '.join(chain + (name,))}")
+        self.start(name)
+        return await self._tasks[name]
+
+    def cancel(self, name: str) -> bool:
+        """아직 끝나지 않은 stage Task를 취소. 실제로 취소했으면 True."""
+        task = self._tasks.get(name)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        self.cancelled.append(name)
+        return True
+
+    def close(self):
+        """요청이 끝날 때 호출: 남은 Task는 취소하고, 아무도 안 읽은 예외는 소비한다."""
+        for name, task in self._tasks.items():
+            if not task.done():
+                self.cancel(name)
+            elif not task.cancelled():
+                task.exception()
+
+    def is_materialized(self, name: str) -> bool:
+        return name in self._values
+
+    @property
+    def executed(self) -> List[str]:
+        """실제로 실행된 stage 이름 (실행 완료 순서)."""
+        return list(self.timings)
+
+    async def _run(self, name: str) -> Any:
+        _CHAIN.set(_CHAIN.get() + (name,))
+        started = time.perf_counter()
+        value = await self._stages[name](self)
+        self.timings[name] = round(time.perf_counter() - started, 3)
+        self._values[name] = value
+        return value